@@ -0,0 +1,193 @@
+# 수집 이미지를 프레임마다 파일 하나로 만들지 않고, 큰 청크 파일에 이어 붙여 저장합니다.
+# 폴더 구조 : chunk_00000.bin (인코딩된 프레임을 순서대로 이어 붙인 데이터)
+#             chunk_00000.idx (JSONL, 프레임당 한 줄 : name / ext / offset / length / meta)
+# 인덱스는 데이터를 쓴 뒤에 기록하므로, 중간에 종료되어도 인덱스에 있는 프레임은 모두 온전합니다.
+#
+# 사용법
+#   python frame_chunk.py list ./img_Grab/
+#   python frame_chunk.py extract ./img_Grab/ ./extracted/
+
+import argparse, json, os, threading
+
+CHUNK_PREFIX = 'chunk'
+
+class ChunkWriter:
+    """ 인코딩된 프레임을 청크 파일에 이어 붙여 저장 (max_bytes / max_frames 초과 시 다음 청크) """
+    def __init__(self, dir_path, max_bytes=1024 * 1024 * 1024, max_frames=None, prefix=CHUNK_PREFIX):
+        self.dir_path = dir_path
+        self.max_bytes = max_bytes
+        self.max_frames = max_frames
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        self.data_file = None
+        self.index_file = None
+        self.chunk_path = None
+        self.offset = 0
+        self.frames = 0
+        os.makedirs(dir_path, exist_ok=True)
+        # 기존 청크는 건드리지 않고 다음 번호부터 새로 시작
+        numbers = chunk_numbers(dir_path, prefix)
+        self.chunk_no = numbers[-1] + 1 if numbers else 0
+
+    def _roll(self):
+        self._close_chunk()
+        base = os.path.join(self.dir_path, f'{self.prefix}_{self.chunk_no:05d}')
+        self.chunk_no += 1
+        self.chunk_path = base + '.bin'
+        self.data_file = open(self.chunk_path, 'ab')
+        self.index_file = open(base + '.idx', 'a', encoding='utf-8')
+        self.offset = self.data_file.tell()
+        self.frames = 0
+
+    def _close_chunk(self):
+        if self.data_file is not None:
+            self.data_file.close()
+            self.index_file.close()
+            self.data_file = self.index_file = None
+
+    def write(self, name, data, ext='.jpg', meta=None):
+        """ 프레임 하나 추가, 저장 위치('chunk_00000.bin#이름.jpg') 반환 """
+        with self.lock:
+            if (self.data_file is None
+                    or (self.frames > 0 and self.offset + len(data) > self.max_bytes)
+                    or (self.max_frames is not None and self.frames >= self.max_frames)):
+                self._roll()
+            offset = self.offset
+            self.data_file.write(data)
+            self.data_file.flush()
+            record = {'name': name, 'ext': ext, 'offset': offset, 'length': len(data)}
+            if meta is not None:
+                record['meta'] = meta
+            self.index_file.write(json.dumps(record, ensure_ascii=False) + '\n')
+            self.index_file.flush()
+            self.offset += len(data)
+            self.frames += 1
+            return f'{os.path.basename(self.chunk_path)}#{name}{ext}'
+
+    def close(self):
+        with self.lock:
+            self._close_chunk()
+
+def chunk_numbers(dir_path, prefix=CHUNK_PREFIX):
+    numbers = []
+    for f in os.listdir(dir_path):
+        if f.startswith(prefix + '_') and f.endswith('.idx'):
+            try:
+                numbers.append(int(f[len(prefix) + 1:-4]))
+            except ValueError:
+                continue
+    return sorted(numbers)
+
+def is_chunk_dir(dir_path, prefix=CHUNK_PREFIX):
+    return os.path.isdir(dir_path) and bool(chunk_numbers(dir_path, prefix))
+
+class ChunkReader:
+    """
+    청크 폴더를 풀지 않고 프레임 단위로 읽기
+    - len(reader), reader.names(), reader.read(name) -> bytes
+    - for name, data in reader : 저장 순서대로 순회
+    - reader.decode(name) -> numpy 배열 (cv2 필요, npy는 numpy만 필요)
+    """
+    def __init__(self, dir_path, prefix=CHUNK_PREFIX):
+        self.dir_path = dir_path
+        self.entries = []
+        self.by_name = {}
+        self.files = {}
+        self.lock = threading.Lock()
+        for no in chunk_numbers(dir_path, prefix):
+            base = f'{prefix}_{no:05d}'
+            with open(os.path.join(dir_path, base + '.idx'), 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except ValueError: # 기록 중 종료된 마지막 줄
+                        continue
+                    record['chunk'] = base + '.bin'
+                    self.by_name[record['name']] = len(self.entries)
+                    self.entries.append(record)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def names(self):
+        return [e['name'] for e in self.entries]
+
+    def _read_entry(self, entry):
+        with self.lock:
+            f = self.files.get(entry['chunk'])
+            if f is None:
+                f = open(os.path.join(self.dir_path, entry['chunk']), 'rb')
+                self.files[entry['chunk']] = f
+            f.seek(entry['offset'])
+            return f.read(entry['length'])
+
+    def read(self, name):
+        return self._read_entry(self.entries[self.by_name[name]])
+
+    def meta(self, name):
+        return self.entries[self.by_name[name]].get('meta')
+
+    def __iter__(self):
+        for entry in self.entries:
+            yield entry['name'], self._read_entry(entry)
+
+    def decode(self, name):
+        entry = self.entries[self.by_name[name]]
+        data = self._read_entry(entry)
+        if entry['ext'] == '.npy':
+            import io
+            import numpy as np
+            return np.load(io.BytesIO(data))
+        import cv2
+        import numpy as np
+        return cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_UNCHANGED)
+
+    def iter_frames(self):
+        """ (name, 디코딩된 배열) 순회 """
+        for entry in self.entries:
+            yield entry['name'], self.decode(entry['name'])
+
+    def close(self):
+        with self.lock:
+            for f in self.files.values():
+                f.close()
+            self.files = {}
+
+def extract(dir_path, out_dir, names=None):
+    """ 청크 폴더의 프레임을 개별 파일로 풀기 (names 지정 시 해당 프레임만) """
+    os.makedirs(out_dir, exist_ok=True)
+    reader = ChunkReader(dir_path)
+    wanted = set(names) if names is not None else None
+    count = 0
+    for entry in reader.entries:
+        if wanted is not None and entry['name'] not in wanted:
+            continue
+        with open(os.path.join(out_dir, entry['name'] + entry['ext']), 'wb') as f:
+            f.write(reader._read_entry(entry))
+        count += 1
+    reader.close()
+    print(f"{count}개 프레임을 풀었습니다: {out_dir}")
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='청크 프레임 저장소 도구')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_list = sub.add_parser('list', help='저장된 프레임 목록')
+    p_list.add_argument('dir')
+    p_extract = sub.add_parser('extract', help='개별 이미지 파일로 풀기')
+    p_extract.add_argument('dir')
+    p_extract.add_argument('out')
+    p_extract.add_argument('--names', nargs='*', default=None, help='특정 프레임만 (확장자 제외 이름)')
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        reader = ChunkReader(args.dir)
+        for entry in reader.entries:
+            print(f"{entry['chunk']}  {entry['offset']:>12}  {entry['length']:>10}  {entry['name']}{entry['ext']}")
+        print(f"총 {len(reader)}개 프레임")
+    elif args.command == 'extract':
+        extract(args.dir, args.out, args.names)
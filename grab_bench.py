@@ -0,0 +1,164 @@
+# img_grab 수집 파이프라인 처리량 측정 (카메라 없이 SyntheticBackend 사용)
+# Camera.get_img -> 저장(인코딩 + 쓰기) 경로를 해상도 / 저장 형식 / 저장 방식 / 버퍼 방식별로 실행하고
+# 단계별 지연시간(retrieve, convert, color, handoff, encode, write), 지속 FPS, 버려진 프레임 수를 JSON으로 출력합니다.
+#
+# 사용법
+#   python grab_bench.py                                  # 기본 조합, 결과는 표준 출력(JSON)
+#   python grab_bench.py --sizes 659x494 2448x2048 --formats jpg npy --modes sync pool --out bench.json
+
+import argparse, contextlib, json, os, platform, shutil, sys, tempfile, threading, time
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+from frame_chunk import ChunkWriter
+from img_grab import Camera, SaveWorkerPool, SyntheticBackend, frame_name, make_encoder, make_no_image
+
+STAGES = ('retrieve', 'convert', 'color', 'handoff', 'encode', 'write')
+
+class TimedSave:
+    """ 프레임별 인코딩 / 쓰기 시간을 기록하는 저장 함수 (SaveWorkerPool save_fn) """
+    def __init__(self, encoder, chunk_writer=None):
+        self.encoder = encoder
+        self.chunk_writer = chunk_writer
+        self.encode_times = []
+        self.write_times = []
+        self.bytes = 0
+        self.lock = threading.Lock() # 풀 스레드 여러 개가 동시에 호출함
+
+    def __call__(self, image, path, name):
+        t0 = time.perf_counter()
+        data = self.encoder.encode(image)
+        t1 = time.perf_counter()
+        if self.chunk_writer is not None:
+            self.chunk_writer.write(name, data, self.encoder.ext)
+        else:
+            with open(os.path.join(path, name) + self.encoder.ext, 'wb') as f:
+                f.write(data)
+        t2 = time.perf_counter()
+        with self.lock:
+            self.encode_times.append(t1 - t0)
+            self.write_times.append(t2 - t1)
+            self.bytes += len(data)
+
+def summarize(samples):
+    if not samples:
+        return None
+    arr = np.sort(np.asarray(samples, np.float64)) * 1000
+    return {'mean_ms': round(float(arr.mean()), 3), 'p50_ms': round(float(arr[len(arr) // 2]), 3),
+            'p95_ms': round(float(arr[min(len(arr) - 1, int(len(arr) * 0.95))]), 3), 'max_ms': round(float(arr[-1]), 3)}
+
+def run_case(size, fmt, mode, buffers, frames, work_dir, workers=2, queue_size=64, policy='block',
+             quality=None, color=None, sink='files'):
+    """
+    size : (W, H) / fmt : jpg, png, webp, npy / mode : sync(그랩 루프에서 바로 저장), pool(SaveWorkerPool)
+    buffers : copy(매 프레임 새 배열), reuse(버퍼 재사용), zero_copy
+    """
+    out_dir = os.path.join(work_dir, f'{size[0]}x{size[1]}_{fmt}_{mode}_{buffers}_{sink}')
+    os.makedirs(out_dir, exist_ok=True)
+
+    cam = Camera(None, None, backend=SyntheticBackend(size[0], size[1], fps=0), color=color,
+                 reuse_buffers=buffers == 'reuse', zero_copy=buffers == 'zero_copy', profile=True)
+    cam.load_camera()
+    chunk_writer = ChunkWriter(out_dir) if sink == 'chunks' else None
+    timed = TimedSave(make_encoder(fmt, quality, verbose=False), chunk_writer)
+    saver = SaveWorkerPool(workers, queue_size, policy, save_fn=timed) if mode == 'pool' else None
+    image_no = make_no_image(*size)
+    samples = {stage: [] for stage in ('retrieve', 'convert', 'color', 'handoff')}
+
+    start = time.perf_counter()
+    for i in range(frames):
+        image_raw, maked_img, grabResult, grab_on = cam.get_img(image_no)
+        if grab_on == 2:
+            for stage, value in cam.timings.items():
+                samples[stage].append(value)
+            name = f'{frame_name(cam.last_meta)}_{i:06d}'
+            t0 = time.perf_counter()
+            if saver is not None:
+                saver.submit(cam.own(maked_img), out_dir, name)
+            else:
+                timed(maked_img, out_dir, name)
+            samples['handoff'].append(time.perf_counter() - t0)
+        if grabResult != 0:
+            image_raw = maked_img = None
+            grabResult.Release()
+    grab_elapsed = time.perf_counter() - start
+
+    dropped = 0
+    if saver is not None:
+        saver.close()
+        dropped = saver.stats()['dropped']
+    total_elapsed = time.perf_counter() - start
+    if chunk_writer is not None:
+        chunk_writer.close()
+    cam.destroy_cam()
+
+    saved = len(timed.encode_times)
+    samples['encode'] = timed.encode_times
+    samples['write'] = timed.write_times
+    stages = {stage: summarize(samples[stage]) for stage in STAGES}
+    return {
+        'size': f'{size[0]}x{size[1]}', 'format': fmt, 'mode': mode, 'buffers': buffers, 'sink': sink,
+        'workers': workers if mode == 'pool' else 0, 'policy': policy if mode == 'pool' else None,
+        'frames': frames, 'saved': saved, 'dropped': dropped, 'missing': cam.monitor.stats()['missing'],
+        'grab_fps': round(frames / grab_elapsed, 2), # 그랩 루프가 유지한 속도
+        'saved_fps': round(saved / total_elapsed, 2), # 디스크까지 반영된 속도 (큐 flush 포함)
+        'kb_per_frame': round(timed.bytes / max(saved, 1) / 1024, 1),
+        'stages': stages,
+    }
+
+def parse_size(text):
+    w, h = text.lower().split('x')
+    return int(w), int(h)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='img_grab 수집 파이프라인 벤치마크')
+    parser.add_argument('--sizes', nargs='+', default=['659x494', '1280x1024', '2448x2048'], help='해상도 (WxH)')
+    parser.add_argument('--formats', nargs='+', default=['jpg', 'npy'], choices=['jpg', 'png', 'webp', 'npy'])
+    parser.add_argument('--modes', nargs='+', default=['sync', 'pool'], choices=['sync', 'pool'])
+    parser.add_argument('--buffers', nargs='+', default=['copy', 'reuse'], choices=['copy', 'reuse', 'zero_copy'])
+    parser.add_argument('--sinks', nargs='+', default=['files'], choices=['files', 'chunks'])
+    parser.add_argument('--frames', type=int, default=200, help='조합별 프레임 수')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--queue-size', type=int, default=64)
+    parser.add_argument('--policy', default='block', choices=SaveWorkerPool.POLICIES)
+    parser.add_argument('--quality', type=int, default=None)
+    parser.add_argument('--color', default=None, choices=['BGR', 'RGB', 'GRAY'])
+    parser.add_argument('--work-dir', default=None, help='임시 저장 폴더 (기본: 시스템 임시 폴더, 종료 시 삭제)')
+    parser.add_argument('--out', default=None, help='결과 JSON 경로 (기본: 표준 출력)')
+    args = parser.parse_args()
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix='grab_bench_')
+    results = []
+    try:
+        with contextlib.redirect_stdout(sys.stderr): # 진행 로그는 stderr, 결과 JSON만 stdout
+            for size in args.sizes:
+                for fmt in args.formats:
+                    for mode in args.modes:
+                        for buffers in args.buffers:
+                            for sink in args.sinks:
+                                result = run_case(parse_size(size), fmt, mode, buffers, args.frames, work_dir,
+                                                  args.workers, args.queue_size, args.policy, args.quality,
+                                                  args.color, sink)
+                                results.append(result)
+                                print(f"{result['size']:>10} {fmt:>4} {mode:>4} {buffers:>9} {sink:>6} | "
+                                      f"grab {result['grab_fps']:>8.1f} fps | saved {result['saved_fps']:>8.1f} fps | "
+                                      f"dropped {result['dropped']}")
+    finally:
+        if args.work_dir is None:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'environment': {'python': platform.python_version(), 'platform': platform.platform(),
+                        'opencv': cv2.__version__, 'numpy': np.__version__, 'cpu_count': os.cpu_count()},
+        'results': results,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+        print(f"결과 저장 : {args.out}", file=sys.stderr)
+    else:
+        print(text)
@@ -1,19 +1,73 @@
-import cv2, os, shutil, time
+import argparse, cv2, io, json, os, queue, shutil, signal, socket, threading, time
 import numpy as np
 from datetime import datetime
-from pypylon import pylon
+from frame_chunk import ChunkWriter
 
-class Camera:
-    """ 카메라 활성화 """
-    def __init__(self, camera_ip, camera_setting, camera_mode='VIDEO'):
+try:
+    from pypylon import pylon
+except ImportError: # Basler SDK가 없는 PC (replay / synthetic 백엔드만 사용)
+    pylon = None
+
+IMG_EXTS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+class SoftGrabResult:
+    """ pylon GrabResult 대용 (replay / synthetic 백엔드) """
+    def __init__(self, array, block_id, timestamp, succeeded=True):
+        self.Array = array
+        self.BlockID = block_id
+        self.TimeStamp = timestamp # ns
+        self.succeeded = succeeded
+
+    def GrabSucceeded(self):
+        return self.succeeded
+
+    def GetTimeStamp(self):
+        return self.TimeStamp
+
+    def GetNumberOfSkippedImages(self):
+        return 0
+
+    def Release(self):
+        pass
+
+class ZeroCopyGrab:
+    """ zero_copy 뷰의 수명을 GrabResult에 묶음 (Release 시 뷰 해제 후 버퍼 반납) """
+    def __init__(self, grabResult, backend):
+        self.grabResult = grabResult
+        self.backend = backend
+
+    def __getattr__(self, name):
+        return getattr(self.grabResult, name)
+
+    def Release(self):
+        self.backend.release_view()
+        self.grabResult.Release()
+
+def enumerate_devices():
+    """ 네트워크의 pylon 카메라 목록 (여러 카메라가 한 번만 검색하도록 공유) """
+    if pylon is None:
+        raise ImportError("pypylon이 설치되어 있지 않습니다. (replay / synthetic 백엔드를 사용하세요)")
+    return pylon.TlFactory.GetInstance().EnumerateDevices()
+
+class PylonBackend:
+    """ Basler 카메라 (pypylon) """
+    name = 'pylon'
+
+    def __init__(self, camera_ip, camera_setting, camera_mode='VIDEO', devices=None):
         self.camera_ip = camera_ip
         self.camera_setting = camera_setting
         self.camera_mode = camera_mode
-        
-    """ 카메라 설정 """
-    def load_camera(self):
-        maxCamerasToUse = 1
-        devices = pylon.TlFactory.GetInstance().EnumerateDevices()
+        self.devices = devices # enumerate_devices() 결과 공유 (None이면 직접 검색)
+        self.cam = None
+        self.converter = None
+        self.pylon_img = None # 재사용 변환 버퍼
+        self.view_ctx = None
+
+    def open(self):
+        if pylon is None:
+            raise ImportError("pypylon이 설치되어 있지 않습니다. (replay / synthetic 백엔드를 사용하세요)")
+
+        devices = self.devices if self.devices is not None else enumerate_devices()
         selectedDevice = None
         
         self.cam = None
@@ -58,19 +112,384 @@ class Camera:
             except Exception as e:
                 raise NameError(f"카메라 이미지 컨버터 설정 초기화 오류 : \n{str(e)}")   
                 
-            return self.cam, self.converter
+        return self.cam, self.converter
+
+    def set_color(self, color):
+        """ 색 변환을 컨버터에서 한 번에 처리 (처리한 경우 color 반환) """
+        formats = {'BGR': pylon.PixelType_BGR8packed, 'RGB': pylon.PixelType_RGB8packed, 'GRAY': pylon.PixelType_Mono8}
+        if color not in formats:
+            return None
+        self.converter.OutputPixelFormat = formats[color]
+        return color
+
+    def retrieve(self, timeout_ms):
+        return self.cam.RetrieveResult(timeout_ms, pylon.TimeoutHandling_ThrowException)
+
+    def _converted(self, grabResult):
+        # 카메라 출력이 이미 목표 포맷이면 변환 생략, 아니면 재사용 PylonImage에 변환
+        if self.converter.ImageHasDestinationFormat(grabResult):
+            return grabResult
+        if self.pylon_img is None:
+            self.pylon_img = pylon.PylonImage()
+        self.converter.Convert(self.pylon_img, grabResult)
+        return self.pylon_img
+
+    def convert(self, grabResult, out=None, view=False):
+        """
+        - 기본 : 매 프레임 새 배열
+        - out : 미리 할당된 배열에 복사 (모양이 다르면 새 배열)
+        - view : 그랩 버퍼를 복사 없이 참조 (release_view 전까지만 유효)
+        """
+        if view:
+            self.release_view()
+            self.view_ctx = self._converted(grabResult).GetArrayZeroCopy()
+            return self.view_ctx.__enter__()
+        if out is None:
+            return self.converter.Convert(grabResult).GetArray()
+        with self._converted(grabResult).GetArrayZeroCopy() as arr:
+            if out.shape == arr.shape and out.dtype == arr.dtype:
+                np.copyto(out, arr)
+            else:
+                out = arr.copy()
+        return out
+
+    def release_view(self):
+        if self.view_ctx is not None:
+            ctx, self.view_ctx = self.view_ctx, None
+            try:
+                ctx.__exit__(None, None, None)
+            except RuntimeError as e: # 뷰 참조가 남아있는 경우
+                print(f"zero-copy 버퍼 해제 경고 : {e}")
+
+    def set_output(self, value):
+        self.cam.UserOutputValue.SetValue(value)
+
+    def close(self):
+        self.release_view()
+        if self.cam is not None:
+            self.cam.StopGrabbing()
+            self.cam.Close()
+            self.cam = None
+
+class SoftBackend:
+    """
+    소프트웨어 프레임 소스 공통 (카메라 없이 파이프라인 테스트/벤치마크용)
+    - fps : 초당 프레임 (0 이하면 제한 없이 최대 속도)
+    - trigger_pattern : '1101' 처럼 반복되는 패턴, '0' 자리의 프레임은 전달하지 않음
+                        (BlockID는 증가하므로 트리거 누락처럼 보임)
+    """
+    name = 'soft'
+
+    def __init__(self, fps=30.0, camera_mode='VIDEO', trigger_pattern=None):
+        self.fps = fps
+        self.camera_mode = camera_mode
+        self.trigger_pattern = trigger_pattern
+        self.block_id = 0
+        self.next_time = None
+
+    def _open(self):
+        pass
+
+    def _next_frame(self):
+        raise NotImplementedError
+
+    def open(self):
+        self._open()
+        self.block_id = 0
+        self.next_time = time.perf_counter()
+        return None, None
+
+    def _wait(self):
+        if self.fps is None or self.fps <= 0:
+            return
+        delay = self.next_time - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        self.next_time = max(self.next_time + 1.0 / self.fps, time.perf_counter() - 1.0 / self.fps)
+
+    def retrieve(self, timeout_ms):
+        start = time.perf_counter()
+        while True:
+            self._wait()
+            frame = self._next_frame()
+            self.block_id += 1
+            if self.trigger_pattern and self.trigger_pattern[(self.block_id - 1) % len(self.trigger_pattern)] == '0':
+                if (time.perf_counter() - start) * 1000 > timeout_ms:
+                    raise TimeoutError(f"{timeout_ms}ms 동안 프레임이 없습니다.")
+                continue
+            return SoftGrabResult(frame, self.block_id, time.time_ns())
+
+    def set_color(self, color):
+        return 'BGR' if color == 'BGR' else None # 소프트 소스는 항상 BGR
+
+    def convert(self, grabResult, out=None, view=False):
+        arr = grabResult.Array
+        if view:
+            return arr
+        if out is None:
+            return arr
+        if out.shape == arr.shape and out.dtype == arr.dtype:
+            np.copyto(out, arr)
+            return out
+        return arr.copy()
+
+    def release_view(self):
+        pass
+
+    def set_output(self, value):
+        print(f"[{self.name}] UserOutputValue = {value}")
+
+    def close(self):
+        pass
+
+class ReplayBackend(SoftBackend):
+    """ 이미지 폴더 또는 동영상 파일을 카메라처럼 재생 """
+    name = 'replay'
+
+    def __init__(self, source, fps=30.0, camera_mode='VIDEO', trigger_pattern=None, loop=True, preload=False):
+        super().__init__(fps, camera_mode, trigger_pattern)
+        self.source = source
+        self.loop = loop
+        self.preload = preload
+        self.files = []
+        self.frames = None
+        self.capture = None
+        self.pos = 0
+
+    def _open(self):
+        self.pos = 0
+        if os.path.isdir(self.source):
+            self.files = sorted(os.path.join(self.source, f) for f in os.listdir(self.source)
+                                if f.lower().endswith(IMG_EXTS))
+            if not self.files:
+                raise FileNotFoundError(f"재생할 이미지가 없습니다: {self.source}")
+            if self.preload: # 디스크 읽기/디코딩 시간을 측정에서 제외
+                self.frames = [cv2.imread(f) for f in self.files]
+        else:
+            self.capture = cv2.VideoCapture(self.source)
+            if not self.capture.isOpened():
+                raise FileNotFoundError(f"동영상을 열 수 없습니다: {self.source}")
+
+    def _next_frame(self):
+        if self.capture is not None:
+            ok, frame = self.capture.read()
+            if not ok and self.loop:
+                self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                ok, frame = self.capture.read()
+            if not ok:
+                raise EOFError("동영상 재생이 끝났습니다.")
+            return frame
+
+        if self.pos >= len(self.files):
+            if not self.loop:
+                raise EOFError("이미지 재생이 끝났습니다.")
+            self.pos = 0
+        idx = self.pos
+        self.pos += 1
+        if self.frames is not None:
+            return self.frames[idx].copy()
+        return cv2.imread(self.files[idx])
+
+    def close(self):
+        if self.capture is not None:
+            self.capture.release()
+            self.capture = None
+        self.frames = None
+
+class SyntheticBackend(SoftBackend):
+    """ 그라데이션 + 이동 막대 + 프레임 번호로 구성된 합성 프레임 생성 """
+    name = 'synthetic'
+
+    def __init__(self, width=659, height=494, fps=30.0, camera_mode='VIDEO', trigger_pattern=None, channels=3):
+        super().__init__(fps, camera_mode, trigger_pattern)
+        self.width = width
+        self.height = height
+        self.channels = channels
+        self.base = None
+
+    def _open(self):
+        grad = np.linspace(0, 255, self.width, dtype=np.float32).astype(np.uint8)
+        self.base = np.repeat(np.tile(grad, (self.height, 1))[:, :, None], self.channels, axis=2)
+
+    def _next_frame(self):
+        frame = self.base.copy()
+        bar = (self.block_id * 8) % self.width
+        frame[:, bar:bar + 16] = 255
+        cv2.putText(frame, str(self.block_id + 1), (10, 40), cv2.FONT_HERSHEY_PLAIN, 3, [0, 0, 255], 2)
+        return frame
+
+def make_backend(name, camera_ip=None, camera_setting=None, camera_mode='VIDEO', source=None,
+                 fps=30.0, trigger_pattern=None, size=(659, 494), devices=None):
+    if name == 'pylon':
+        return PylonBackend(camera_ip, camera_setting, camera_mode, devices=devices)
+    if name == 'replay':
+        if source is None:
+            raise ValueError("replay 백엔드는 source(이미지 폴더 또는 동영상 경로)가 필요합니다.")
+        return ReplayBackend(source, fps=fps, camera_mode=camera_mode, trigger_pattern=trigger_pattern)
+    if name == 'synthetic':
+        return SyntheticBackend(size[0], size[1], fps=fps, camera_mode=camera_mode, trigger_pattern=trigger_pattern)
+    raise ValueError(f"지원하지 않는 카메라 백엔드입니다: {name}")
+
+def _grab_attr(grabResult, getter, attr):
+    """ GrabResult 값 읽기 (카메라 / 백엔드에 따라 없는 항목은 None) """
+    try:
+        if hasattr(grabResult, getter):
+            return getattr(grabResult, getter)()
+        return getattr(grabResult, attr)
+    except Exception:
+        return None
+
+def frame_meta(grabResult, host_time):
+    """ 프레임 메타데이터 (파일 이름은 저장 시각이 아닌 수신 시각 기준) """
+    return {
+        'host_time': host_time,
+        'timestamp': _grab_attr(grabResult, 'GetTimeStamp', 'TimeStamp'), # 카메라 노출 시각 (tick)
+        'block_id': _grab_attr(grabResult, 'GetBlockID', 'BlockID'),
+        'image_number': _grab_attr(grabResult, 'GetImageNumber', 'ImageNumber'),
+        'skipped': _grab_attr(grabResult, 'GetNumberOfSkippedImages', 'NumberOfSkippedImages') or 0,
+        'missing': 0,
+        'succeeded': bool(grabResult.GrabSucceeded()),
+    }
+
+def frame_name(meta, with_block_id=False):
+    name = datetime.fromtimestamp(meta['host_time']).strftime('%Y-%m-%d_%H-%M-%S-%f')
+    if with_block_id and meta.get('block_id') is not None:
+        name += f"_{meta['block_id']}"
+    return name
+
+class TriggerMonitor:
+    """
+    BlockID 연속성으로 누락 프레임(트리거) 검출
+    - missing : BlockID 건너뜀 (카메라가 노출했지만 전달되지 않은 프레임)
+    - skipped : 그랩 전략(LatestImageOnly 등)에 의해 버려진 프레임
+    - failed : 불완전 프레임 (GrabSucceeded 실패)
+    """
+    BLOCK_ID_MAX = 65535 # GigE Vision 1.x (0은 사용하지 않고 1부터 다시 시작)
+    MAX_WRAP_GAP = 1024 # 순환으로 보기엔 큰 역방향 점프는 BlockID 리셋 (카메라 재연결 등)
+
+    def __init__(self):
+        self.last_block_id = None
+        self.frames = 0
+        self.missing = 0
+        self.skipped = 0
+        self.failed = 0
+        self.resets = 0
+        self.gaps = [] # 최근 누락 구간 [(시작 BlockID, 개수), ...]
+
+    def update(self, meta):
+        """ 메타데이터 반영 후 이 프레임 직전에 누락된 개수 반환 (meta['missing_from'] = 누락 시작 BlockID) """
+        self.frames += 1
+        self.skipped += meta['skipped']
+        if not meta['succeeded']:
+            self.failed += 1
+
+        block_id = meta['block_id']
+        gap = 0
+        if block_id is not None and self.last_block_id is not None:
+            gap = block_id - self.last_block_id - 1
+            if gap < 0:
+                gap = (self.BLOCK_ID_MAX - self.last_block_id) + (block_id - 1) # BlockID 순환
+                if gap > self.MAX_WRAP_GAP:
+                    self.resets += 1 # 리셋은 누락이 아님
+                    gap = 0
+            gap = max(0, gap - meta['skipped']) # 그랩 전략으로 버린 프레임은 누락이 아님
+            if gap:
+                start = self.last_block_id + 1 if self.last_block_id < self.BLOCK_ID_MAX else 1
+                self.missing += gap
+                self.gaps.append((start, gap))
+                self.gaps = self.gaps[-100:]
+                meta['missing_from'] = start
+        if block_id is not None:
+            self.last_block_id = block_id
+        meta['missing'] = gap
+        return gap
+
+    def stats(self):
+        return {'frames': self.frames, 'missing': self.missing, 'skipped': self.skipped, 'failed': self.failed,
+                'resets': self.resets}
+
+class Camera:
+    """
+    카메라 활성화
+    - color : None(BGR 그대로) / 'RGB' / 'GRAY' (가능하면 컨버터에서 한 번에 변환)
+    - reuse_buffers : 출력 배열을 미리 할당해 매 프레임 재사용
+    - zero_copy : 그랩 버퍼를 복사 없이 반환 (grabResult.Release() 전까지만 유효)
+    reuse_buffers / zero_copy 모드에서 다음 프레임 이후까지 보관할 이미지는 own()으로 복사
+    """
+    COLOR_CODES = {'RGB': cv2.COLOR_BGR2RGB, 'GRAY': cv2.COLOR_BGR2GRAY}
+
+    def __init__(self, camera_ip, camera_setting, camera_mode='VIDEO', saver=None, backend=None,
+                 color=None, reuse_buffers=False, zero_copy=False, profile=False):
+        self.camera_ip = camera_ip
+        self.camera_setting = camera_setting
+        self.camera_mode = camera_mode
+        self.saver = saver # SaveWorkerPool (종료 시 남은 저장 작업 flush)
+        self.backend = backend if backend is not None else PylonBackend(camera_ip, camera_setting, camera_mode)
+        self.color = color
+        self.reuse_buffers = reuse_buffers
+        self.zero_copy = zero_copy
+        self.backend_color = None # 백엔드가 직접 출력하는 색 형식
+        self.buffers = {} # 재사용 출력 버퍼
+        self.monitor = TriggerMonitor()
+        self.last_meta = None # 마지막 그랩의 메타데이터 (frame_meta)
+        self.profile = profile
+        self.timings = {} # profile=True 일 때 마지막 프레임의 단계별 소요 시간 (초)
+        self.cam = None
+        self.converter = None
+        
+    """ 카메라 설정 """
+    def load_camera(self):
+        self.cam, self.converter = self.backend.open()
+        if self.color is not None:
+            self.backend_color = self.backend.set_color(self.color)
+        return self.cam, self.converter
+
+    def own(self, image):
+        """ 재사용/zero-copy 버퍼면 복사본, 아니면 그대로 """
+        if self.reuse_buffers or self.zero_copy:
+            return image.copy()
+        return image
+
+    def _color_convert(self, image_raw):
+        if self.color is None or self.color == 'BGR' or self.backend_color == self.color:
+            return image_raw # 변환 불필요 (같은 배열)
+        code = self.COLOR_CODES[self.color]
+        if self.color == 'RGB' and not self.reuse_buffers:
+            return cv2.cvtColor(image_raw, code, dst=image_raw) # 채널 순서만 바뀌므로 제자리 변환
+        dst = self.buffers.get('color')
+        if dst is not None and dst.shape[:2] != image_raw.shape[:2]:
+            dst = None
+        dst = cv2.cvtColor(image_raw, code, dst=dst)
+        if self.reuse_buffers:
+            self.buffers['color'] = dst
+        return dst
             
     """ 이미지 생성 """
     def get_img(self, image_no):
         grab_on = 0 #카메라 인식 초기화
         grabResult = 0
+        self.last_meta = None
         try:
-            grabResult = self.cam.RetrieveResult(2000, pylon.TimeoutHandling_ThrowException) #2초 반응없을 시 넘어감 
+            t0 = time.perf_counter() if self.profile else 0
+            grabResult = self.backend.retrieve(2000) #2초 반응없을 시 넘어감 
+            t1 = time.perf_counter() if self.profile else 0
+            self.last_meta = frame_meta(grabResult, time.time())
+            self.monitor.update(self.last_meta)
+            if self.zero_copy:
+                grabResult = ZeroCopyGrab(grabResult, self.backend)
             if grabResult.GrabSucceeded():
-                image_raw = self.converter.Convert(grabResult).GetArray()
+                if self.zero_copy:
+                    image_raw = self.backend.convert(grabResult.grabResult, view=True)
+                elif self.reuse_buffers:
+                    image_raw = self.backend.convert(grabResult, out=self.buffers.get('raw'))
+                    self.buffers['raw'] = image_raw
+                else:
+                    image_raw = self.backend.convert(grabResult)
                 #image_raw = cv2.rotate(image_raw,cv2.ROTATE_90_CLOCKWISE) #시계방향 90도 회전
-                #image_rgb = cv2.cvtColor(image_raw, cv2.COLOR_BGR2RGB) # 흑백이미지용
-                image_rgb = cv2.cvtColor(cv2.cvtColor(image_raw, cv2.COLOR_BGR2RGB), cv2.COLOR_BGR2RGB) # 컬러이미지용
+                t2 = time.perf_counter() if self.profile else 0
+                image_rgb = self._color_convert(image_raw)
+                if self.profile:
+                    self.timings = {'retrieve': t1 - t0, 'convert': t2 - t1, 'color': time.perf_counter() - t2}
                 grab_on = 2
                 return image_raw, image_rgb, grabResult, grab_on
             else : 
@@ -81,11 +500,16 @@ class Camera:
             #print('Can\'t Read the Camera')
         return image_no, image_no, grabResult, grab_on #인식 실패 , 카메라 고장, 센서 미입력 등
 
+    """ 카메라 출력 신호 (UserOutput) """
+    def set_output(self, value):
+        self.backend.set_output(value)
+
     def destroy_cam(self):
-        if self.cam is not None:
-            self.cam.StopGrabbing()
-            self.cam.Close()
-            self.cam = None
+        if self.saver is not None:
+            self.saver.close() # 큐에 남은 이미지 모두 저장 후 종료
+            self.saver = None
+        self.backend.close()
+        self.cam = None
 
 def create_folder(path):
     if not os.path.exists(path):
@@ -101,77 +525,990 @@ def Q2save(image, path, name):
     save_path = os.path.join(path, name) + '.jpg'
     cv2.imwrite(save_path, image)
     print("Save Image as {}.jpg".format(name))
+    return save_path
 
+class ImageEncoder:
+    """ 이미지 인코더 공통 (프레임별 인코딩 시간 / 쓰기 시간 / 바이트 수 집계) """
+    ext = '.jpg'
 
-if __name__ == "__main__":
-    camera_ip = '192.168.60.1'
-    camera_setting = './12B_BURN_UP.pfs'
+    def __init__(self, verbose=True):
+        self.verbose = verbose
+        self.lock = threading.Lock()
+        self.count = 0
+        self.encode_time = 0.0
+        self.write_time = 0.0
+        self.bytes = 0
+
+    def encode(self, image):
+        raise NotImplementedError
+
+    def _record(self, encode_time, write_time, size):
+        with self.lock:
+            self.count += 1
+            self.encode_time += encode_time
+            self.write_time += write_time
+            self.bytes += size
+
+    def save(self, image, path, name):
+        """ Q2save 대체 (SaveWorkerPool save_fn), 저장 경로 반환 """
+        save_path = os.path.join(path, name) + self.ext
+        t0 = time.perf_counter()
+        data = self.encode(image)
+        t1 = time.perf_counter()
+        with open(save_path, 'wb') as f:
+            f.write(data)
+        t2 = time.perf_counter()
+        self._record(t1 - t0, t2 - t1, len(data))
+        if self.verbose:
+            print("Save Image as {}{}".format(name, self.ext))
+        return save_path
+
+    def stats(self):
+        with self.lock:
+            n = max(self.count, 1)
+            return {'format': self.ext.lstrip('.'), 'frames': self.count,
+                    'encode_ms': round(self.encode_time / n * 1000, 3), 'write_ms': round(self.write_time / n * 1000, 3),
+                    'kb_per_frame': round(self.bytes / n / 1024, 1), 'total_mb': round(self.bytes / 1024 / 1024, 1)}
+
+class CvEncoder(ImageEncoder):
+    """ cv2.imencode 기반 (jpg / png / webp) """
+    def __init__(self, params=(), verbose=True):
+        super().__init__(verbose)
+        self.params = list(params)
+
+    def encode(self, image):
+        ok, buf = cv2.imencode(self.ext, image, self.params)
+        if not ok:
+            raise ValueError(f"{self.ext} 인코딩 실패")
+        return buf.tobytes()
+
+class JpegEncoder(CvEncoder):
+    ext = '.jpg'
+
+    def __init__(self, quality=95, verbose=True):
+        super().__init__([cv2.IMWRITE_JPEG_QUALITY, int(quality)], verbose)
+
+class PngEncoder(CvEncoder):
+    ext = '.png'
+
+    def __init__(self, compression=3, verbose=True):
+        super().__init__([cv2.IMWRITE_PNG_COMPRESSION, int(compression)], verbose)
+
+class WebpEncoder(CvEncoder):
+    """ quality > 100 이면 무손실 (기본) """
+    ext = '.webp'
+
+    def __init__(self, quality=101, verbose=True):
+        super().__init__([cv2.IMWRITE_WEBP_QUALITY, int(quality)], verbose)
+
+class NpyEncoder(ImageEncoder):
+    """ 압축 없이 numpy 배열 그대로 저장 (CPU 부담 최소, 용량 최대) """
+    ext = '.npy'
+
+    def encode(self, image):
+        buf = io.BytesIO()
+        np.save(buf, image)
+        return buf.getvalue()
+
+    def save(self, image, path, name):
+        save_path = os.path.join(path, name) + self.ext
+        t0 = time.perf_counter()
+        np.save(save_path, image) # 직렬화 없이 파일에 바로 기록 (인코딩 + 쓰기 시간이 write_ms 에 같이 들어감)
+        self._record(0.0, time.perf_counter() - t0, os.path.getsize(save_path))
+        if self.verbose:
+            print("Save Image as {}{}".format(name, self.ext))
+        return save_path
+
+ENCODERS = {'jpg': JpegEncoder, 'png': PngEncoder, 'webp': WebpEncoder, 'npy': NpyEncoder}
+
+class ChunkSink:
+    """
+    프레임별 파일 대신 청크 파일에 이어 붙여 저장 (frame_chunk.ChunkReader / extract 로 읽기)
+    저장 폴더(path)별로 ChunkWriter를 따로 둠 (다중 카메라 / 이벤트 폴더)
+    """
+    def __init__(self, encoder, max_bytes=1024 * 1024 * 1024):
+        self.encoder = encoder
+        self.max_bytes = max_bytes
+        self.writers = {}
+        self.lock = threading.Lock()
+
+    def _writer(self, path):
+        with self.lock:
+            writer = self.writers.get(path)
+            if writer is None:
+                writer = self.writers[path] = ChunkWriter(path, max_bytes=self.max_bytes)
+            return writer
+
+    def save(self, image, path, name):
+        t0 = time.perf_counter()
+        data = self.encoder.encode(image)
+        t1 = time.perf_counter()
+        location = self._writer(path).write(name, data, self.encoder.ext)
+        self.encoder._record(t1 - t0, time.perf_counter() - t1, len(data))
+        if self.encoder.verbose:
+            print("Save Image as {}".format(location))
+        return location
+
+    def close(self):
+        with self.lock:
+            for writer in self.writers.values():
+                writer.close()
+            self.writers = {}
+
+def make_encoder(fmt='jpg', quality=None, verbose=True):
+    """ quality : jpg/webp 품질, png 압축 레벨 (None이면 기본값) """
+    if fmt not in ENCODERS:
+        raise ValueError(f"지원하지 않는 저장 형식입니다: {fmt} (가능: {', '.join(ENCODERS)})")
+    if quality is None or fmt == 'npy':
+        return ENCODERS[fmt](verbose=verbose)
+    return ENCODERS[fmt](quality, verbose=verbose)
+
+class MetadataSidecar:
+    """
+    프레임 메타데이터를 이미지 폴더의 frames.jsonl (또는 frames.csv) 에 기록
+    event : saved(저장됨) / queue_dropped(저장 큐에서 버려짐) / missing(카메라에서 누락)
+    """
+    FIELDS = ('event', 'file', 'host_time', 'timestamp', 'block_id', 'image_number', 'skipped', 'missing')
+
+    def __init__(self, fmt='jsonl'):
+        if fmt not in ('jsonl', 'csv'):
+            raise ValueError(f"지원하지 않는 메타데이터 형식입니다: {fmt}")
+        self.fmt = fmt
+        self.files = {} # 폴더별 파일 핸들 (다중 카메라)
+        self.lock = threading.Lock()
 
-    CAM = Camera(camera_ip, camera_setting, camera_mode='VIDEO')
+    def _file(self, path):
+        f = self.files.get(path)
+        if f is None:
+            file_path = os.path.join(path, 'frames.' + self.fmt)
+            new = not os.path.exists(file_path)
+            f = open(file_path, 'a', encoding='utf-8', newline='')
+            if self.fmt == 'csv' and new:
+                f.write(','.join(self.FIELDS) + '\n')
+            self.files[path] = f
+        return f
+
+    def write(self, path, record):
+        if self.fmt == 'jsonl':
+            line = json.dumps({k: record.get(k) for k in self.FIELDS if record.get(k) is not None}, ensure_ascii=False)
+        else:
+            line = ','.join('' if record.get(k) is None else str(record.get(k)) for k in self.FIELDS)
+        with self.lock:
+            f = self._file(path)
+            f.write(line + '\n')
+            f.flush()
+
+    def missing(self, path, meta):
+        """ 직전 프레임과의 BlockID 공백을 missing 이벤트로 기록 """
+        if meta and meta.get('missing'):
+            self.write(path, dict(meta, event='missing', block_id=meta.get('missing_from'),
+                                  timestamp=None, image_number=None)) # host_time = 검출 시각
+
+    def close(self):
+        with self.lock:
+            for f in self.files.values():
+                f.close()
+            self.files = {}
+
+class SaveWorkerPool:
+    """ 비동기 이미지 저장 (그랩 루프는 큐에 넣기만 함) """
+    POLICIES = ('block', 'drop_oldest', 'drop_newest')
+
+    def __init__(self, num_workers=2, max_queue=64, policy='block', save_fn=Q2save, sidecar=None):
+        if policy not in self.POLICIES:
+            raise ValueError(f"지원하지 않는 저장 정책입니다: {policy} (가능: {', '.join(self.POLICIES)})")
+        self.policy = policy
+        self.save_fn = save_fn
+        self.sidecar = sidecar # MetadataSidecar (meta와 함께 제출된 이미지만 기록)
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.lock = threading.Lock()
+        self.submitted = 0
+        self.saved = 0
+        self.dropped = 0
+        self.failed = 0
+        self.closed = False
+
+        self.workers = []
+        for i in range(num_workers):
+            t = threading.Thread(target=self._worker, name=f'img-writer-{i}', daemon=True)
+            t.start()
+            self.workers.append(t)
+
+    def submit(self, image, path, name, meta=None):
+        """ (image, path, name) 저장 예약. 버려진 경우 False 반환 """
+        if self.closed:
+            raise RuntimeError("이미 종료된 저장 큐입니다.")
+        item = (image, path, name, meta)
+        with self.lock:
+            self.submitted += 1
+
+        if self.policy == 'block':
+            self.queue.put(item)
+            return True
+
+        if self.policy == 'drop_newest':
+            try:
+                self.queue.put_nowait(item)
+                return True
+            except queue.Full:
+                self._dropped(item)
+                return False
+
+        # drop_oldest : 가장 오래된 항목을 버리고 새 이미지를 넣음
+        while True:
+            try:
+                self.queue.put_nowait(item)
+                return True
+            except queue.Full:
+                try:
+                    old = self.queue.get_nowait()
+                except queue.Empty:
+                    continue
+                self.queue.task_done()
+                self._dropped(old)
+
+    def _dropped(self, item):
+        with self.lock:
+            self.dropped += 1
+        image, path, name, meta = item
+        if self.sidecar is not None and meta is not None:
+            self.sidecar.write(path, dict(meta, event='queue_dropped', file=name))
+
+    def _worker(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                image, path, name, meta = item
+                save_path = self.save_fn(image, path, name)
+                with self.lock:
+                    self.saved += 1
+                if self.sidecar is not None and meta is not None:
+                    file = os.path.basename(save_path) if isinstance(save_path, str) else name
+                    self.sidecar.write(path, dict(meta, event='saved', file=file))
+            except Exception as e:
+                with self.lock:
+                    self.failed += 1
+                print(f"이미지 저장 실패 ({item[2]}) : {e}")
+            finally:
+                self.queue.task_done()
+
+    def stats(self):
+        with self.lock:
+            return {'depth': self.queue.qsize(), 'submitted': self.submitted, 'saved': self.saved,
+                    'dropped': self.dropped, 'failed': self.failed}
+
+    def flush(self):
+        """ 큐에 있는 모든 이미지가 저장될 때까지 대기 """
+        self.queue.join()
+
+    def close(self):
+        if self.closed:
+            return
+        self.flush()
+        self.closed = True
+        for _ in self.workers:
+            self.queue.put(None)
+        for t in self.workers:
+            t.join()
+        if self.sidecar is not None:
+            self.sidecar.close()
+        print('저장 통계 :', self.stats())
+
+
+class RateLimiter:
+    """ window_sec 동안 최대 max_count장까지 저장 허용 (기본 10분당 100장) """
+    def __init__(self, max_count=100, window_sec=600):
+        self.max_count = max_count
+        self.window_sec = window_sec
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.start_time = time.time()
+
+    def allow(self):
+        if time.time() - self.start_time >= self.window_sec: # 시간 창이 지나면 초기화
+            self.reset()
+        if self.max_count is None or self.count < self.max_count:
+            self.count += 1
+            return True
+        return False
+
+class FrameRingBuffer:
+    """
+    최근 capacity 프레임을 미리 할당한 고정 메모리에 순환 보관
+    - pin() 된 구간의 프레임은 덮어쓰기 직전에 spilled 로 복사해 두었다가 unpin() 때 버림
+    """
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.frames = None # (capacity, H, W, C) 첫 프레임 크기로 한 번만 할당
+        self.metas = [None] * capacity
+        self.slot_seq = np.full(capacity, -1, np.int64) # 슬롯에 들어있는 프레임 번호
+        self.count = 0 # 지금까지 넣은 프레임 수 (다음 프레임 번호)
+        self.lock = threading.Lock()
+        self.cond = threading.Condition(self.lock)
+        self.pins = {} # token: [아직 필요한 첫 프레임 번호, 마지막 프레임 번호]
+        self.spilled = {} # 덮어써진 고정 프레임 seq: (image, meta)
+        self.spills = 0
+        self.closed = False
+        self._next_token = 0
+
+    def allocate(self, shape, dtype=np.uint8):
+        self.frames = np.empty((self.capacity,) + tuple(shape), dtype)
+        self.slot_seq[:] = -1
+
+    def push(self, image, meta=None):
+        with self.lock:
+            if self.frames is None or self.frames.shape[1:] != image.shape:
+                self.allocate(image.shape, image.dtype)
+            idx = self.count % self.capacity
+            old = int(self.slot_seq[idx])
+            if old >= 0 and any(first <= old <= last for first, last in self.pins.values()):
+                self.spilled[old] = (self.frames[idx].copy(), self.metas[idx]) # 아직 저장 안 된 이벤트 프레임
+                self.spills += 1
+            np.copyto(self.frames[idx], image)
+            self.metas[idx] = meta
+            self.slot_seq[idx] = self.count
+            self.count += 1
+            self.cond.notify_all()
+
+    def copy_frame(self, seq):
+        """ seq번 프레임 복사본과 메타데이터 (이미 덮어써졌으면 None) """
+        with self.lock:
+            if seq in self.spilled:
+                return self.spilled[seq]
+            idx = seq % self.capacity
+            if seq < 0 or self.slot_seq[idx] != seq:
+                return None, None
+            return self.frames[idx].copy(), self.metas[idx]
+
+    def wait_for(self, seq, timeout=None):
+        """ seq번 프레임이 들어올 때까지 대기 (close 후에는 바로 반환) """
+        with self.cond:
+            self.cond.wait_for(lambda: self.count > seq or self.closed, timeout)
+            return self.count > seq
+
+    def pin(self, first, last):
+        """ first~last 프레임을 unpin 전까지 잃지 않도록 고정 """
+        with self.lock:
+            token = self._next_token
+            self._next_token += 1
+            self.pins[token] = [first, last]
+            return token
+
+    def advance(self, token, seq):
+        """ seq 이전 프레임은 더 이상 필요 없음 """
+        with self.lock:
+            self.pins[token][0] = seq
+            self._drop_spilled()
+
+    def unpin(self, token):
+        with self.lock:
+            self.pins.pop(token, None)
+            self._drop_spilled()
+
+    def _drop_spilled(self):
+        for seq in list(self.spilled):
+            if not any(first <= seq <= last for first, last in self.pins.values()):
+                del self.spilled[seq]
+
+    def resize(self, capacity):
+        """ 최근 프레임은 유지한 채 용량 변경 (고정된 구간이 없을 때만) """
+        with self.lock:
+            if self.pins or capacity == self.capacity:
+                return False
+            frames, metas, slot_seq = self.frames, self.metas, self.slot_seq
+            self.capacity = capacity
+            self.metas = [None] * capacity
+            self.slot_seq = np.full(capacity, -1, np.int64)
+            self.frames = None
+            if frames is not None:
+                self.frames = np.empty((capacity,) + frames.shape[1:], frames.dtype)
+                for idx in np.flatnonzero(slot_seq >= max(0, self.count - capacity)):
+                    seq = int(slot_seq[idx])
+                    self.frames[seq % capacity] = frames[idx]
+                    self.metas[seq % capacity] = metas[idx]
+                    self.slot_seq[seq % capacity] = seq
+            return True
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+class EventRecorder:
+    """
+    이벤트(키 입력 / 릴레이 출력 / 원격 명령) 전후 프레임 저장
+    - 평소에는 최근 pre_sec + post_sec + 여유분 만큼만 링 버퍼에 보관 (디스크 기록 없음)
+    - 이벤트가 들어오면 바로 백그라운드 스레드가 이전 프레임부터 저장하고, 이후 프레임은 들어오는 대로 저장
+    - 이벤트 구간은 저장이 끝날 때까지 링 버퍼에 고정 (저장이 느려도 덮어써지기 전에 따로 보관)
+    - margin_sec=None 이면 측정한 프레임당 저장 시간으로 여유분을 다시 계산
+    """
+    def __init__(self, dir_path, fps=30.0, pre_sec=2.0, post_sec=2.0, margin_sec=None, save_fn=Q2save, sidecar=None):
+        self.dir_path = dir_path
+        self.fps = fps
+        self.pre = max(1, int(round(pre_sec * fps)))
+        self.post = int(round(post_sec * fps))
+        self.auto_margin = margin_sec is None
+        margin = max(1, int(round((1.0 if margin_sec is None else margin_sec) * fps)))
+        self.ring = FrameRingBuffer(self.pre + self.post + margin)
+        self.save_fn = save_fn
+        self.sidecar = sidecar
+        self.active = [] # 저장 중이거나 대기 중인 이벤트
+        self.jobs = queue.Queue()
+        self.saved = 0
+        self.lost = 0 # 저장 전에 덮어써진 프레임
+        self.save_time = None # 프레임당 저장 시간 (이동 평균, 초)
+        self.thread = threading.Thread(target=self._dumper, name='event-dumper', daemon=True)
+        self.thread.start()
+
+    def push(self, image, meta=None):
+        self.ring.push(image, meta)
+
+    def trigger(self, label='event'):
+        newest = self.ring.count - 1
+        event_dir = os.path.join(self.dir_path, 'events', f"{datetime.now().strftime('%Y-%m-%d_%H-%M-%S-%f')}_{label}")
+        job = {'dir': event_dir, 'start': max(0, newest - self.pre + 1), 'end': newest + self.post}
+        job['pin'] = self.ring.pin(job['start'], job['end'])
+        self.active.append(job)
+        self.jobs.put(job)
+        print(f"이벤트 기록 : {label} (이전 {self.pre} / 이후 {self.post} 프레임)")
+
+    def _dumper(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                self.jobs.task_done()
+                return
+            try:
+                os.makedirs(job['dir'], exist_ok=True)
+                seq = job['start']
+                while seq <= job['end']: # close() 가 end 를 줄일 수 있음
+                    if not self.ring.wait_for(seq):
+                        break
+                    image, meta = self.ring.copy_frame(seq)
+                    self.ring.advance(job['pin'], seq + 1)
+                    seq += 1
+                    if image is None:
+                        self.lost += 1
+                        continue
+                    name = frame_name(meta) if meta is not None else f'{seq - 1:08d}'
+                    t0 = time.perf_counter()
+                    save_path = self.save_fn(image, job['dir'], name)
+                    elapsed = time.perf_counter() - t0
+                    self.save_time = elapsed if self.save_time is None else 0.9 * self.save_time + 0.1 * elapsed
+                    self.saved += 1
+                    if self.sidecar is not None and meta is not None:
+                        file = os.path.basename(save_path) if isinstance(save_path, str) else name
+                        self.sidecar.write(job['dir'], dict(meta, event='saved', file=file))
+            except Exception as e:
+                print(f"이벤트 저장 실패 : {e}")
+            finally:
+                self.ring.unpin(job['pin'])
+                self.active.remove(job)
+                self.jobs.task_done()
+            if self.auto_margin and not self.active:
+                self._fit_margin()
+
+    def _fit_margin(self):
+        """
+        링 버퍼 크기 = 이벤트 하나를 저장하는 동안 덮어써지지 않을 만큼
+        프레임 k (이벤트 기준) 는 (k + pre) * save_time 에 저장되고 (k + capacity) / fps 에 덮어써짐
+        """
+        if not self.save_time:
+            return
+        window = self.pre + self.post
+        need = (window - 1) * self.save_time * self.fps - self.post
+        margin = max(1, int(np.ceil(max(0.0, need - window) * 1.25 + 0.25 * self.fps)))
+        margin = min(margin, window) # 그 이상은 고정 프레임 복사(spilled)로 처리
+        capacity = window + margin
+        if capacity > self.ring.capacity * 1.1 or capacity < self.ring.capacity * 0.5:
+            if self.ring.resize(capacity):
+                print(f"이벤트 링 버퍼 : {capacity} 프레임 (저장 {self.save_time * 1000:.1f} ms/프레임)")
+
+    def stats(self):
+        return {'pending': len(self.active), 'saved': self.saved, 'lost': self.lost, 'spilled': self.ring.spills,
+                'capacity': self.ring.capacity}
+
+    def close(self):
+        """ 대기 중인 이벤트는 지금까지 모인 프레임까지만 저장 """
+        newest = self.ring.count - 1
+        for job in list(self.active):
+            job['end'] = min(job['end'], newest)
+        self.ring.close()
+        self.jobs.put(None)
+        self.thread.join()
+
+def pulse_output(camera, duration=0.5):
+    """ 카메라 출력 신호를 duration 초 동안 켬 (그랩 루프를 멈추지 않도록 타이머로 해제) """
+    print("카메라에서 신호를 출력합니다.")
+    camera.set_output(True)
+    def _off():
+        camera.set_output(False)
+        print("카메라에서 신호를 초기화합니다.")
+    threading.Timer(duration, _off).start()
+
+def make_no_image(width=659, height=494):
+    image_no = np.zeros((height, width, 3), np.uint8)
+    text_size = cv2.getTextSize('NO IMAGE', cv2.FONT_HERSHEY_PLAIN, 5, 3)[0]
+    cv2.putText(image_no, 'No Image', (int((width - text_size[0]) / 2), int((height + text_size[1]) / 2)), 
+                    cv2.FONT_HERSHEY_PLAIN, 5, [225,255,255], 3)
+    return image_no
+
+class CameraWorker(threading.Thread):
+    """ 카메라 1대 전용 그랩 스레드 (카메라별 저장 폴더 / 저장 제한) """
+    def __init__(self, name, camera, dir_path, saver, limiter=None, tile_size=(659, 494)):
+        super().__init__(name=f'grab-{name}', daemon=True)
+        self.cam_name = name
+        self.camera = camera
+        self.dir_path = dir_path
+        self.saver = saver
+        self.limiter = limiter if limiter is not None else RateLimiter()
+        self.tile_size = tile_size
+        self.image_no = make_no_image(*tile_size)
+        self.operating = threading.Event()
+        self.stop_event = threading.Event()
+        self.snapshot_event = threading.Event()
+        self.lock = threading.Lock()
+        self.tile = self.image_no
+        self.frames = 0
+        self.saved = 0
+
+    def run(self):
+        while not self.stop_event.is_set():
+            image_raw, maked_img, grabResult, grab_on = self.camera.get_img(self.image_no)
+            meta = self.camera.last_meta
+            if meta is not None and meta['missing']:
+                print(f"[{self.cam_name}] 누락 프레임 {meta['missing']}개 (BlockID {meta.get('missing_from')}~)")
+                if self.saver.sidecar is not None:
+                    self.saver.sidecar.missing(self.dir_path, meta)
+
+            if grab_on == 2:
+                self.frames += 1
+                save = self.snapshot_event.is_set()
+                if not save and self.operating.is_set():
+                    save = self.limiter.allow()
+                if save:
+                    self.snapshot_event.clear()
+                    img_name = frame_name(meta, with_block_id=self.camera.camera_mode == 'TRIGGER')
+                    self.saver.submit(self.camera.own(maked_img), self.dir_path, img_name, meta)
+                    self.saved += 1
+                tile = cv2.resize(maked_img, self.tile_size, interpolation=cv2.INTER_AREA) # 미리보기용 축소본
+                if tile.ndim == 2:
+                    tile = cv2.cvtColor(tile, cv2.COLOR_GRAY2BGR)
+                with self.lock:
+                    self.tile = tile
+
+            if grabResult != 0:
+                image_raw = maked_img = None
+                grabResult.Release()
+
+    def get_tile(self):
+        with self.lock:
+            return self.tile
+
+class MultiCamera:
+    """
+    여러 카메라 동시 수집
+    configs : [{'name', 'backend'(pylon/replay/synthetic), 'ip', 'pfs', 'mode', 'source', 'fps',
+                'dir', 'max_images', 'window_sec'}, ...]
+    """
+    def __init__(self, configs, saver=None, tile_size=(659, 494), cols=None, **camera_options):
+        self.configs = configs
+        self.saver = saver if saver is not None else SaveWorkerPool(num_workers=max(2, len(configs)))
+        self.tile_size = tile_size
+        self.cols = cols if cols is not None else int(np.ceil(np.sqrt(len(configs))))
+        self.camera_options = camera_options
+        self.workers = []
+
+    def open(self):
+        devices = None
+        if any(cfg.get('backend', 'pylon') == 'pylon' for cfg in self.configs):
+            devices = enumerate_devices() # 한 번만 검색하여 모든 카메라가 공유
+
+        for i, cfg in enumerate(self.configs):
+            name = cfg.get('name', f'cam{i}')
+            backend = make_backend(cfg.get('backend', 'pylon'), cfg.get('ip'), cfg.get('pfs'), cfg.get('mode', 'VIDEO'),
+                                   source=cfg.get('source'), fps=cfg.get('fps', 30.0),
+                                   trigger_pattern=cfg.get('trigger_pattern'), size=tuple(cfg.get('size', (659, 494))),
+                                   devices=devices)
+            camera = Camera(cfg.get('ip'), cfg.get('pfs'), camera_mode=cfg.get('mode', 'VIDEO'), backend=backend,
+                            **self.camera_options)
+            camera.load_camera()
+            dir_path = create_folder(cfg.get('dir', os.path.join('./img_Grab/', name)))
+            limiter = RateLimiter(cfg.get('max_images', 100), cfg.get('window_sec', 600))
+            self.workers.append(CameraWorker(name, camera, dir_path, self.saver, limiter, self.tile_size))
+
+        for worker in self.workers:
+            worker.start()
+        return self
+
+    def start(self):
+        for worker in self.workers:
+            worker.operating.set()
+
+    def stop(self):
+        for worker in self.workers:
+            worker.operating.clear()
+
+    def reset(self):
+        for worker in self.workers:
+            worker.limiter.reset()
+
+    def snapshot(self):
+        for worker in self.workers:
+            worker.snapshot_event.set()
+
+    def set_output(self, value):
+        for worker in self.workers:
+            worker.camera.set_output(value)
+
+    def stats(self):
+        return {worker.cam_name: dict(worker.camera.monitor.stats(), saved=worker.saved) for worker in self.workers}
+
+    def preview(self):
+        """ 카메라별 최신 프레임을 격자로 합친 미리보기 """
+        w, h = self.tile_size
+        blank = np.zeros((h, w, 3), np.uint8)
+        tiles = []
+        for worker in self.workers:
+            tile = worker.get_tile().copy()
+            cv2.putText(tile, worker.cam_name, (10, 30), cv2.FONT_HERSHEY_PLAIN, 2, [0, 255, 0], 2)
+            tiles.append(tile)
+        while len(tiles) % self.cols:
+            tiles.append(blank)
+        rows = [np.hstack(tiles[r:r + self.cols]) for r in range(0, len(tiles), self.cols)]
+        return np.vstack(rows)
+
+    def close(self):
+        for worker in self.workers:
+            worker.stop_event.set()
+        for worker in self.workers:
+            worker.join()
+            worker.camera.destroy_cam()
+        self.workers = []
+        self.saver.close()
+
+class CommandChannel:
+    """
+    키보드 대신 사용하는 원격 명령 (헤드리스 모드)
+    - UDP 127.0.0.1:port 로 'start' / 'stop' / 'reset' / 'snapshot' / 'relay' / 'event' / 'quit' 문자열 전송
+      예) echo -n snapshot | nc -u -w0 127.0.0.1 5555
+    - 시그널 : SIGUSR1 = start, SIGUSR2 = stop, SIGHUP = snapshot, SIGINT / SIGTERM = quit
+    """
+    COMMANDS = ('start', 'stop', 'reset', 'snapshot', 'relay', 'event', 'quit')
+    SIGNALS = {'SIGUSR1': 'start', 'SIGUSR2': 'stop', 'SIGHUP': 'snapshot', 'SIGINT': 'quit', 'SIGTERM': 'quit'}
+
+    def __init__(self, port=None, use_signals=True):
+        self.commands = queue.Queue()
+        self.sock = None
+        if port:
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.sock.bind(('127.0.0.1', port))
+            threading.Thread(target=self._listen, name='command-listener', daemon=True).start()
+            print(f"명령 수신 대기 : udp://127.0.0.1:{port}")
+        if use_signals:
+            for sig_name, command in self.SIGNALS.items():
+                sig = getattr(signal, sig_name, None) # Windows에는 SIGUSR1 등이 없음
+                if sig is not None:
+                    signal.signal(sig, lambda signum, frame, command=command: self.commands.put(command))
+
+    def _listen(self):
+        while True:
+            try:
+                data, _ = self.sock.recvfrom(1024)
+            except OSError: # close()
+                return
+            command = data.decode('utf-8', errors='ignore').strip().lower()
+            if command in self.COMMANDS:
+                self.commands.put(command)
+            else:
+                print(f"알 수 없는 명령 : {command}")
+
+    def put(self, command):
+        self.commands.put(command)
+
+    def poll(self):
+        """ 대기 중인 명령 목록 (없으면 빈 리스트) """
+        commands = []
+        while True:
+            try:
+                commands.append(self.commands.get_nowait())
+            except queue.Empty:
+                return commands
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+class FpsMeter:
+    """ 일정 간격(interval 초)마다 실제 수집 FPS 출력 """
+    def __init__(self, interval=5.0, label='grab'):
+        self.interval = interval
+        self.label = label
+        self.frames = 0
+        self.total = 0
+        self.start_time = self.last_time = time.time()
+
+    def tick(self, extra=None):
+        self.frames += 1
+        self.total += 1
+        now = time.time()
+        if self.interval and now - self.last_time >= self.interval:
+            fps = self.frames / (now - self.last_time)
+            print(f"[{self.label}] {fps:.1f} fps" + (f" | {extra()}" if extra is not None else ""))
+            self.frames = 0
+            self.last_time = now
+
+    def average(self):
+        elapsed = time.time() - self.start_time
+        return self.total / elapsed if elapsed > 0 else 0.0
+
+KEY_COMMANDS = {ord('q'): 'start', ord('s'): 'stop', ord('r'): 'reset', ord('p'): 'snapshot', ord('k'): 'relay',
+                ord('e'): 'event', 27: 'quit'}
+
+def show_preview(window_name, image, scale):
+    if scale != 1.0:
+        image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    cv2.imshow(window_name, image)
+    return KEY_COMMANDS.get(cv2.waitKey(1) & 0xFF)
+
+def run_single(args):
+    camera_ip = args.ip
+    camera_setting = args.pfs
+    backend = make_backend(args.backend, camera_ip, camera_setting, args.mode, source=args.source, fps=args.fps,
+                           trigger_pattern=args.trigger_pattern, size=tuple(int(v) for v in args.size.split('x')))
+
+    # 저장 큐 : block(대기) / drop_oldest(오래된 것 버림) / drop_newest(새 것 버림)
+    sidecar = MetadataSidecar(args.sidecar) if args.sidecar != 'none' else None
+    encoder = make_encoder(args.format, args.quality, verbose=not args.quiet) # q / p / 이벤트 저장 모두 같은 형식
+    sink = ChunkSink(encoder, args.chunk_mb * 1024 * 1024) if args.sink == 'chunks' else None
+    save_fn = sink.save if sink is not None else encoder.save
+    saver = SaveWorkerPool(num_workers=args.writers, max_queue=args.queue_size, policy=args.queue_policy,
+                           save_fn=save_fn, sidecar=sidecar)
+
+    CAM = Camera(camera_ip, camera_setting, camera_mode=args.mode, saver=saver, backend=backend,
+                 color=args.color, reuse_buffers=args.reuse_buffers, zero_copy=args.zero_copy)
     cam, converter = CAM.load_camera()
     
-    window_name = 'Press Q = save Image / S = stop / R = reset / P = 1 shot / K = Cam Relay / ESC = Quit'
-    last_save_time = time.time()
-    last_img_save_number = 0
-    operating = 0
+    window_name = 'Press Q = save Image / S = stop / R = reset / P = 1 shot / K = Cam Relay / E = Event / ESC = Quit'
+    limiter = RateLimiter(max_count=args.max_images or None, window_sec=args.window_sec) # 기본 10분당 최대 100장 (0 = 무제한)
+    operating = 1 if args.start else 0
+    preview_every = 0 if args.headless and args.preview_every <= 1 else args.preview_every # 헤드리스 기본 = 미리보기 없음
     
-    dir_path = create_folder('./img_Grab/')
+    dir_path = create_folder(args.out)
+    commands = CommandChannel(args.control_port, use_signals=args.headless)
+    meter = FpsMeter(args.log_interval)
+    recorder = None
+    if args.event_pre > 0 or args.event_post > 0: # 이벤트 전후 프레임 기록 (링 버퍼)
+        recorder = EventRecorder(dir_path, fps=args.event_fps or args.fps or 30.0, pre_sec=args.event_pre,
+                                 post_sec=args.event_post, margin_sec=args.event_margin, save_fn=save_fn, sidecar=sidecar)
     
-    cam.UserOutputValue.SetValue(False) # 카메라 출력 초기화
+    CAM.set_output(False) # 카메라 출력 초기화
     
-    image_no = np.zeros((494,659,3), np.uint8)
-    text_size = cv2.getTextSize('NO IMAGE', cv2.FONT_HERSHEY_PLAIN, 5, 3)[0]
-    cv2.putText(image_no, 'No Image', (int((659 - text_size[0]) / 2), int((494 + text_size[1]) / 2)), 
-                    cv2.FONT_HERSHEY_PLAIN, 5, [225,255,255], 3)
+    image_no = make_no_image()
     
     maked_img = image_no
-    cv2.namedWindow(window_name, cv2.WINDOW_NORMAL)
-    cv2.resizeWindow(window_name, 1318, 988)
-    cv2.imshow(window_name, maked_img)
+    if preview_every:
+        cv2.namedWindow(window_name, cv2.WINDOW_NORMAL)
+        cv2.resizeWindow(window_name, int(1318 * args.preview_scale), int(988 * args.preview_scale))
+        cv2.imshow(window_name, maked_img)
     
-    while True:
+    frame_count = 0
+    running = True
+    while running:
         image_raw, maked_img, grabResult, grab_on = CAM.get_img(image_no)
+        meta = CAM.last_meta
+        frame_count += 1
+
+        if meta is not None and meta['missing']:
+            print(f"⚠️ 누락 프레임 {meta['missing']}개 (BlockID {meta.get('missing_from')}~)")
+            if sidecar is not None:
+                sidecar.missing(dir_path, meta)
+
+        if grab_on == 2:
+            meter.tick(lambda: f"{saver.stats()} | {CAM.monitor.stats()}")
+            if recorder is not None:
+                recorder.push(maked_img, meta)
     
         if grab_on == 2 and operating == 1:
-            if last_img_save_number < 100:
-                img_name = datetime.now().strftime('%Y-%m-%d_%H-%M-%S-%f')
-                Q2save(maked_img, dir_path, img_name)
-                last_img_save_number += 1
-            else: pass
-            if time.time() - last_save_time >= 600: # 10분이 지났는지 확인
-                last_img_save_number = 0
-                last_save_time = time.time()
-            else: pass
-            
-        cv2.imshow(window_name, maked_img)
-        cv2.resizeWindow(window_name, 1318, 988)
-        
-        k = cv2.waitKey(1) & 0xFF
+            if limiter.allow():
+                img_name = frame_name(meta, with_block_id=args.mode == 'TRIGGER')
+                saver.submit(CAM.own(maked_img), dir_path, img_name, meta)
+
+        pending = commands.poll()
+        if preview_every and frame_count % preview_every == 0: # N 프레임마다 1번만 화면 갱신
+            key_command = show_preview(window_name, maked_img, args.preview_scale)
+            if key_command is not None:
+                pending.append(key_command)
         
-        if k == ord('q'):
-            operating = 1
-            print('Start...')
-        elif k == ord('s'):
-            operating = 0
-            print('...Stop')
-        elif k == ord('r'):
-            last_img_save_number = 0
-            last_save_time = time.time()
-            print('---Reset---')
-        elif k == ord('p'):
-            img_name = datetime.now().strftime('%Y-%m-%d_%H-%M-%S-%f')
-            Q2save(maked_img, dir_path, img_name)
-        elif k == ord('k'):
-            print("카메라에서 신호를 출력합니다.")
-            cam.UserOutputValue.SetValue(True)
-            sleep(0.5)
-            cam.UserOutputValue.SetValue(False)
-            print("카메라에서 신호를 초기화합니다.")
-        elif k == 27:
-            break
+        for command in pending:
+            if command == 'start':
+                operating = 1
+                print('Start...')
+            elif command == 'stop':
+                operating = 0
+                print('...Stop')
+                print('저장 큐 상태 :', saver.stats())
+                print('프레임 상태 :', CAM.monitor.stats())
+                print('인코딩 상태 :', encoder.stats())
+            elif command == 'reset':
+                limiter.reset()
+                print('---Reset---')
+            elif command == 'snapshot':
+                if grab_on == 2:
+                    saver.submit(CAM.own(maked_img), dir_path, frame_name(meta, args.mode == 'TRIGGER'), meta)
+                else:
+                    saver.submit(maked_img, dir_path, datetime.now().strftime('%Y-%m-%d_%H-%M-%S-%f'))
+            elif command == 'relay':
+                pulse_output(CAM)
+                if recorder is not None:
+                    recorder.trigger('relay')
+            elif command == 'event':
+                if recorder is not None:
+                    recorder.trigger('event')
+                else:
+                    print("이벤트 기록이 꺼져 있습니다. (--event-pre / --event-post)")
+            elif command == 'quit':
+                running = False
         
         if grabResult != 0:
+            image_raw = maked_img = None # zero-copy 뷰 참조 해제 후 반납
             grabResult.Release()
     
+    print(f"평균 수집 속도 : {meter.average():.1f} fps")
+    print('프레임 상태 :', CAM.monitor.stats())
+    if recorder is not None:
+        recorder.close()
+        print('이벤트 기록 :', recorder.stats())
+    commands.close()
     CAM.destroy_cam()
-    cv2.destroyAllWindows()
+    if sink is not None:
+        sink.close()
+    print('인코딩 상태 :', encoder.stats())
+    if preview_every:
+        cv2.destroyAllWindows()
+
+def run_multi(args):
+    with open(args.cameras, 'r', encoding='utf-8') as f:
+        configs = json.load(f)
+    if isinstance(configs, dict):
+        configs = configs['cameras']
+
+    sidecar = MetadataSidecar(args.sidecar) if args.sidecar != 'none' else None
+    encoder = make_encoder(args.format, args.quality, verbose=not args.quiet)
+    sink = ChunkSink(encoder, args.chunk_mb * 1024 * 1024) if args.sink == 'chunks' else None
+    saver = SaveWorkerPool(num_workers=max(args.writers, len(configs)), max_queue=args.queue_size,
+                           policy=args.queue_policy, save_fn=sink.save if sink is not None else encoder.save,
+                           sidecar=sidecar)
+    multi = MultiCamera(configs, saver=saver, color=args.color, reuse_buffers=args.reuse_buffers,
+                        zero_copy=args.zero_copy).open()
+    window_name = 'Press Q = save Image / S = stop / R = reset / P = 1 shot / K = Cam Relay / ESC = Quit'
+    commands = CommandChannel(args.control_port, use_signals=args.headless)
+    if not args.headless:
+        cv2.namedWindow(window_name, cv2.WINDOW_NORMAL)
+    multi.set_output(False)
+    if args.start:
+        multi.start()
+
+    last_log = time.time()
+    running = True
+    while running:
+        pending = commands.poll()
+        if args.headless:
+            time.sleep(0.05) # 수집은 카메라별 스레드, 메인은 명령만 처리
+        else:
+            key_command = show_preview(window_name, multi.preview(), args.preview_scale)
+            if key_command is not None:
+                pending.append(key_command)
+        if args.log_interval and time.time() - last_log >= args.log_interval:
+            print('카메라별 상태 :', multi.stats())
+            last_log = time.time()
+
+        for command in pending:
+            if command == 'start':
+                multi.start()
+                print('Start...')
+            elif command == 'stop':
+                multi.stop()
+                print('...Stop')
+                print('카메라별 상태 :', multi.stats())
+                print('저장 큐 상태 :', multi.saver.stats())
+                print('인코딩 상태 :', encoder.stats())
+            elif command == 'reset':
+                multi.reset()
+                print('---Reset---')
+            elif command == 'snapshot':
+                multi.snapshot()
+            elif command == 'relay':
+                pulse_output(multi)
+            elif command == 'quit':
+                running = False
+
+    commands.close()
+    multi.close()
+    if sink is not None:
+        sink.close()
+    print('인코딩 상태 :', encoder.stats())
+    if not args.headless:
+        cv2.destroyAllWindows()
+
+def parse_args(argv=None):
+    """ 명령행 인자 (--config JSON의 값이 기본값이 되고, 명령행 인자가 우선) """
+    parser = argparse.ArgumentParser(description='카메라 이미지 수집')
+    parser.add_argument('--config', default=None, help='설정 JSON (키 이름 = 인자 이름, 예: {"headless": true, "fps": 60})')
+    parser.add_argument('--backend', default='pylon', choices=['pylon', 'replay', 'synthetic'])
+    parser.add_argument('--ip', default='192.168.60.1', help='pylon 카메라 IP')
+    parser.add_argument('--pfs', default='./12B_BURN_UP.pfs', help='pylon 카메라 설정 파일')
+    parser.add_argument('--mode', default='VIDEO', choices=['VIDEO', 'TRIGGER'])
+    parser.add_argument('--source', default=None, help='replay : 이미지 폴더 또는 동영상 경로')
+    parser.add_argument('--fps', type=float, default=30.0, help='replay / synthetic 프레임 속도 (0 = 최대)')
+    parser.add_argument('--trigger-pattern', default=None, help="replay / synthetic 트리거 패턴 (예: '1101')")
+    parser.add_argument('--size', default='659x494', help='synthetic 프레임 크기 (WxH)')
+    parser.add_argument('--color', default=None, choices=['BGR', 'RGB', 'GRAY'], help='출력 색 형식 (기본: BGR)')
+    parser.add_argument('--reuse-buffers', action='store_true', help='출력 버퍼 재사용')
+    parser.add_argument('--zero-copy', action='store_true', help='그랩 버퍼를 복사 없이 사용')
+    parser.add_argument('--cameras', default=None, help='다중 카메라 설정 JSON (카메라별 name/ip/pfs/dir/max_images ...)')
+    parser.add_argument('--out', default='./img_Grab/', help='저장 폴더')
+    parser.add_argument('--max-images', type=int, default=100, help='시간 창당 최대 저장 수 (0 = 무제한)')
+    parser.add_argument('--window-sec', type=float, default=600, help='저장 제한 시간 창 (초)')
+    parser.add_argument('--writers', type=int, default=2, help='저장 스레드 수')
+    parser.add_argument('--queue-size', type=int, default=64, help='저장 큐 크기')
+    parser.add_argument('--queue-policy', default='drop_oldest', choices=SaveWorkerPool.POLICIES)
+    parser.add_argument('--format', default='jpg', choices=list(ENCODERS), help='저장 형식')
+    parser.add_argument('--quality', type=int, default=None,
+                        help='jpg/webp 품질 (webp 101 = 무손실, 기본), png 압축 레벨 0~9')
+    parser.add_argument('--quiet', action='store_true', help='프레임별 저장 로그 끄기')
+    parser.add_argument('--sink', default='files', choices=['files', 'chunks'],
+                        help='files = 프레임당 파일 하나, chunks = 청크 파일에 이어 붙이기 (frame_chunk.py)')
+    parser.add_argument('--chunk-mb', type=int, default=1024, help='청크 파일 최대 크기 (MB)')
+    parser.add_argument('--sidecar', default='jsonl', choices=['jsonl', 'csv', 'none'],
+                        help='프레임 메타데이터 기록 형식 (frames.jsonl / frames.csv)')
+    parser.add_argument('--headless', action='store_true', help='화면 없이 실행 (명령은 --control-port / 시그널)')
+    parser.add_argument('--preview-every', type=int, default=1, help='N 프레임마다 미리보기 갱신 (0 = 미리보기 없음)')
+    parser.add_argument('--preview-scale', type=float, default=1.0, help='미리보기 축소 비율')
+    parser.add_argument('--control-port', type=int, default=None, help='명령 수신 UDP 포트 (127.0.0.1)')
+    parser.add_argument('--start', action='store_true', help='시작과 동시에 저장 (q 입력과 동일)')
+    parser.add_argument('--log-interval', type=float, default=5.0, help='FPS 로그 간격 (초, 0 = 끔)')
+    parser.add_argument('--event-pre', type=float, default=0.0, help='이벤트 이전 기록 시간 (초, 0 = 끔)')
+    parser.add_argument('--event-post', type=float, default=0.0, help='이벤트 이후 기록 시간 (초)')
+    parser.add_argument('--event-fps', type=float, default=None, help='링 버퍼 크기 계산용 FPS (기본: --fps)')
+    parser.add_argument('--event-margin', type=float, default=None, help='링 버퍼 여유분 (초, 기본: 측정한 저장 시간으로 자동)')
+
+    args, _ = parser.parse_known_args(argv)
+    if args.config:
+        with open(args.config, 'r', encoding='utf-8') as f:
+            parser.set_defaults(**{k.replace('-', '_'): v for k, v in json.load(f).items()})
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    if args.cameras:
+        run_multi(args)
+    else:
+        run_single(args)
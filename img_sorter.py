@@ -1,5 +1,17 @@
+import argparse
+import errno
+import hashlib
+import io
+import json
+import math
 import os
+import queue
 import shutil
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import Tk, Button, Label, Frame, filedialog, StringVar, Radiobutton, Toplevel, Checkbutton
 from tkinter import font as tkFont
 from tkinter import simpledialog, messagebox
@@ -7,6 +19,23 @@ from PIL import Image, ImageTk, ImageDraw, ImageFont
 
 
 IMG_EXTS = (".png", ".jpg", ".jpeg", ".bmp", ".gif")
+PREFETCH_AHEAD = 4   # 미리 읽어둘 다음 이미지 수
+PREFETCH_BEHIND = 1  # 되돌리기 대비 이전 이미지 수
+PREVIEW_SIZE = (1000, 800)  # 분류 화면 표시 크기 (1280x1024 → 1000px 축소 결과)
+PREVIEW_FAST = True         # JPEG 축소 디코딩(draft) 사용 여부
+EDITOR_SIZE = (1450, 860)   # 라벨 편집 캔버스 크기
+EDITOR_MAX_ZOOM = 8.0       # 편집기 최대 확대 (원본 1픽셀 → 화면 8픽셀)
+GRID_SHAPE = (4, 6)         # 그리드 검토 (행, 열)
+GRID_TILE = (300, 240)      # 그리드 칸 크기
+THUMB_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "img_sorter", "thumbs.sqlite")
+THUMB_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+DEFAULT_CLASSES = ["OK", "NG"]
+CLASSES_FILE = "img_sorter_classes.json"  # 이미지 폴더에 있으면 그 폴더에서는 이 분류 목록 사용
+CLASS_KEYS = "1234567890"  # 분류별 단축키 (최대 10개)
+ARROW_HINTS = {0: ", ←", 1: ", →"}  # 방향키로 바로 선택되는 분류 (버튼 표시용)
+JOURNAL_FILE = ".img_sorter_journal.jsonl"  # 폴더별 작업 기록 (이동/통과/라벨 수정/되돌리기/위치)
+JOURNAL_FLUSH_SEC = 0.5  # 기록을 모아서 디스크에 반영하는 주기
+SCAN_BATCH = 512  # 스캔 중 한 번에 목록에 추가할 파일 수
 
 
 def yolo_txt_path(image_path: str) -> str:
@@ -62,6 +91,581 @@ def save_yolo_txt(txt_path: str, labels):
     os.replace(tmp_path, txt_path)
 
 
+def load_classes(path: str):
+    """
+    분류 목록 읽기 (JSON)
+    - ["OK", "NG", "Scratch", ...] 또는 [{"name": "Scratch", "dir": "/data/scratch"}, ...]
+    - dir 생략 시 이미지 폴더 아래 name 폴더, 상대 경로면 이미지 폴더 기준
+    - 단축키는 순서대로 1~9, 0
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        items = json.load(f)
+    return make_classes(items)
+
+
+def make_classes(items):
+    if not items:
+        raise ValueError("분류 목록이 비어 있습니다.")
+    if len(items) > len(CLASS_KEYS):
+        raise ValueError(f"분류는 최대 {len(CLASS_KEYS)}개까지 지원합니다. ({len(items)}개)")
+    classes = []
+    for key, item in zip(CLASS_KEYS, items):
+        if isinstance(item, str):
+            item = {"name": item}
+        name = item["name"]
+        classes.append({"name": name, "dir": item.get("dir", name), "key": key})
+    if len({c["name"] for c in classes}) != len(classes):
+        raise ValueError("분류 이름이 중복되었습니다.")
+    return classes
+
+
+class ThumbCache:
+    """
+    축소 이미지 디스크 캐시 (SQLite 파일 하나)
+    - 키: sha1(경로 | 표시 크기 | mtime) → 원본이 바뀌면 자동으로 새로 만듦
+    - max_bytes 초과 시 오래 사용하지 않은 것부터 삭제
+    - 여러 스레드(미리 읽기)에서 같이 사용
+    """
+    def __init__(self, db_path=THUMB_CACHE_PATH, max_bytes=THUMB_CACHE_MAX_BYTES, quality=90):
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.max_bytes = max_bytes
+        self.quality = quality
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS thumbs (key TEXT PRIMARY KEY, data BLOB NOT NULL, "
+                          "size INTEGER NOT NULL, last_used REAL NOT NULL)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS thumbs_last_used ON thumbs(last_used)")
+        self.conn.commit()
+        self.total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM thumbs").fetchone()[0]
+        self.touched = {} # key: last_used (아직 기록 안 함)
+        self.warned = False
+
+    @staticmethod
+    def _key(path: str, size):
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        raw = f"{os.path.abspath(path)}|{size[0]}x{size[1]}|{mtime}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def get(self, path: str, size):
+        """ 캐시 오류(잠김, 손상 등)는 None → 캐시 없이 디코딩 """
+        key = self._key(path, size)
+        if key is None:
+            return None
+        try:
+            with self.lock:
+                row = self.conn.execute("SELECT data FROM thumbs WHERE key=?", (key,)).fetchone()
+                if row is None:
+                    return None
+                # last_used 는 모아서 기록 (읽을 때마다 쓰기 트랜잭션을 열어 두지 않음)
+                self.touched[key] = time.time()
+                if len(self.touched) >= 64:
+                    self._flush_touched()
+                    self.conn.commit()
+            img = Image.open(io.BytesIO(row[0]))
+            img.load()
+            return img
+        except (sqlite3.Error, OSError) as e:
+            self._warn(e)
+            return None
+
+    def put(self, path: str, size, img: Image.Image):
+        key = self._key(path, size)
+        if key is None:
+            return
+        buf = io.BytesIO()
+        img.save(buf, format="JPEG", quality=self.quality)
+        data = buf.getvalue()
+        with self.lock:
+            try:
+                self._flush_touched()
+                old = self.conn.execute("SELECT size FROM thumbs WHERE key=?", (key,)).fetchone()
+                self.conn.execute("INSERT OR REPLACE INTO thumbs (key, data, size, last_used) VALUES (?, ?, ?, ?)",
+                                  (key, sqlite3.Binary(data), len(data), time.time()))
+                self.total += len(data) - (old[0] if old else 0)
+                if self.total > self.max_bytes:
+                    self._evict()
+                self.conn.commit()
+            except sqlite3.Error as e:
+                self.conn.rollback()
+                self._warn(e)
+
+    def _flush_touched(self):
+        if self.touched:
+            self.conn.executemany("UPDATE thumbs SET last_used=? WHERE key=?",
+                                  [(t, key) for key, t in self.touched.items()])
+            self.touched = {}
+
+    def _warn(self, e):
+        # 다른 프로세스가 잠근 경우 등: 한 번만 알리고 캐시 없이 계속
+        if not self.warned:
+            self.warned = True
+            print(f"썸네일 캐시 오류 (캐시 없이 계속): {e}")
+
+    def _evict(self):
+        # 용량의 90%까지 오래된 것부터 삭제
+        target = int(self.max_bytes * 0.9)
+        rows = self.conn.execute("SELECT key, size FROM thumbs ORDER BY last_used").fetchall()
+        removed = []
+        for key, size in rows:
+            if self.total <= target:
+                break
+            removed.append((key,))
+            self.total -= size
+        self.conn.executemany("DELETE FROM thumbs WHERE key=?", removed)
+
+    def close(self):
+        with self.lock:
+            try:
+                self._flush_touched()
+                self.conn.commit()
+            except sqlite3.Error as e:
+                self._warn(e)
+            self.conn.close()
+
+
+def open_thumb_cache():
+    """ 캐시 파일을 열 수 없으면(권한 등) 캐시 없이 동작 """
+    try:
+        return ThumbCache()
+    except (OSError, sqlite3.Error) as e:
+        print(f"썸네일 캐시를 사용할 수 없습니다: {e}")
+        return None
+
+
+def decode_preview(image_path: str, fast: bool = PREVIEW_FAST, size=PREVIEW_SIZE):
+    """
+    분류 화면용 축소 디코딩
+    - fast: JPEG는 draft()로 1/2, 1/4, 1/8 축소 디코딩 후 BILINEAR 한 번만 리사이즈
+    - 아니면 기존 방식 (원본 디코딩 → 1280x1024 → LANCZOS 축소)
+    - 박스 좌표는 정규화 값이라 미리보기 해상도와 무관 (정밀 편집은 LabelEditorPopup에서 원본으로)
+    """
+    img = Image.open(image_path)
+    if not fast:
+        img = img.convert("RGB").resize((1280, 1024))
+        img.thumbnail(size, Image.LANCZOS)
+        return img
+    # draft는 JPEG에서만 동작 (요청 크기 이상을 유지하는 가장 작은 배율 선택), 다른 형식은 무시됨
+    img.draft("RGB", size)
+    return img.convert("RGB").resize(size, Image.BILINEAR)
+
+
+def load_preview(image_path: str, thumb_cache=None, size=PREVIEW_SIZE):
+    """
+    분류 화면용 이미지 + 라벨 읽기 (백그라운드 스레드에서 실행)
+    return: (PIL.Image 축소본, labels)
+    """
+    img = thumb_cache.get(image_path, size) if thumb_cache is not None else None
+    if img is None:
+        img = decode_preview(image_path, size=size)
+        if thumb_cache is not None:
+            thumb_cache.put(image_path, size, img)
+
+    txt_path = yolo_txt_path(image_path)
+    labels = parse_yolo_txt(txt_path) if os.path.exists(txt_path) else []
+    return img, labels
+
+
+class PreviewCache:
+    """
+    이미지 미리 읽기 캐시
+    - prefetch(paths): 백그라운드 스레드 풀에서 디코딩/축소
+    - get(path): 캐시에 있으면 즉시, 읽는 중이면 완료 대기, 없으면 바로 읽음
+    - 키: (경로, 이미지 mtime, txt mtime) → 파일이 바뀌면 자동으로 다시 읽음
+    """
+    def __init__(self, loader=load_preview, max_items=32, workers=2):
+        self.loader = loader
+        self.max_items = max_items
+        self.items = OrderedDict()  # key -> (img, labels), LRU 순서
+        self.pending = {}           # key -> Future
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch")
+
+    @staticmethod
+    def _key(path: str):
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        try:
+            txt_mtime = os.stat(yolo_txt_path(path)).st_mtime_ns
+        except OSError:
+            txt_mtime = 0
+        return (path, mtime, txt_mtime)
+
+    def _store(self, key, value):
+        with self.lock:
+            self.items[key] = value
+            self.items.move_to_end(key)
+            while len(self.items) > self.max_items:
+                self.items.popitem(last=False)
+
+    def _load(self, key):
+        try:
+            value = self.loader(key[0])
+        finally:
+            with self.lock:
+                self.pending.pop(key, None)
+        self._store(key, value)
+        return value
+
+    def get(self, path: str):
+        key = self._key(path)
+        if key is None:
+            return self.loader(path)  # 파일이 없으면 로더의 예외를 그대로 전달
+        with self.lock:
+            if key in self.items:
+                self.items.move_to_end(key)
+                return self.items[key]
+            future = self.pending.get(key)
+        if future is not None:
+            return future.result()
+        return self._load(key)
+
+    def prefetch(self, paths):
+        for path in paths:
+            key = self._key(path)
+            if key is None:
+                continue
+            with self.lock:
+                if key in self.items or key in self.pending:
+                    continue
+                self.pending[key] = self.executor.submit(self._load, key)
+
+    def clear(self):
+        with self.lock:
+            for future in self.pending.values():
+                future.cancel()
+            self.pending.clear()
+            self.items.clear()
+
+    def shutdown(self):
+        self.clear()
+        self.executor.shutdown(wait=False)
+
+
+class FolderIndex:
+    """
+    폴더 이미지 목록 (백그라운드 os.scandir 스캔)
+    - 첫 묶음이 발견되는 즉시 사용 가능, 나머지는 스캔하면서 뒤에 추가
+    - 경로는 폴더 prefix 하나 + 파일명 리스트로 보관
+    - 스캔이 끝나면 아직 보지 않은 뒷부분만 이름순 정렬 (이미 본 위치는 그대로)
+    - resume_name 이 있으면 그 이름부터 시작, 앞선 이름은 스캔이 끝난 뒤 맨 뒤에 붙임 (한 바퀴 돌면 전부 보게 됨)
+    - index[i] → 전체 경로, index[a:b] → 경로 리스트
+    """
+    def __init__(self, folder: str, exts=IMG_EXTS, resume_name=None):
+        self.prefix = folder
+        self.exts = exts
+        self.resume_name = resume_name
+        self.names = []
+        self.before = []    # resume_name 보다 앞선 이름 (스캔 완료 후 뒤에 추가)
+        self.visited = -1   # UI가 읽은 가장 뒤 위치
+        self.done = False
+        self.error = None
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._scan, name="folder-index", daemon=True)
+        self.thread.start()
+
+    def _scan(self):
+        batch = []
+        try:
+            with os.scandir(self.prefix) as it:
+                for entry in it:
+                    if self.stop_event.is_set():
+                        return
+                    name = entry.name
+                    if not name.lower().endswith(self.exts) or not entry.is_file():
+                        continue
+                    if self.resume_name is not None and name < self.resume_name:
+                        self.before.append(name)
+                        continue
+                    batch.append(name)
+                    if len(batch) >= SCAN_BATCH:
+                        self._extend(batch)
+                        batch = []
+        except OSError as e:
+            self.error = e
+        self._extend(batch)
+        with self.lock:
+            start = self.visited + 1
+            self.names[start:] = sorted(self.names[start:]) + sorted(self.before)
+            self.done = True
+
+    def _extend(self, batch):
+        batch.sort()
+        with self.lock:
+            self.names.extend(batch)
+
+    def wait_first(self, timeout=None):
+        """ 첫 이미지가 발견되거나 스캔이 끝날 때까지 대기 """
+        deadline = None if timeout is None else time.time() + timeout
+        while not self.done and not self.names:
+            if deadline is not None and time.time() >= deadline:
+                break
+            time.sleep(0.01)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.prefix, name)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, i):
+        with self.lock:
+            if isinstance(i, slice):
+                return [self.path(n) for n in self.names[i]]
+            name = self.names[i]
+            if i >= 0:
+                self.visited = max(self.visited, i)
+        return self.path(name)
+
+    def __setitem__(self, i, path):
+        with self.lock:
+            self.names[i] = os.path.basename(path)
+
+    def append(self, path):
+        with self.lock:
+            self.names.append(os.path.basename(path))
+
+    def pin(self, i):
+        """ i 까지는 스캔 완료 후 정렬에서 제외 (화면에 이미 보여준 범위) """
+        with self.lock:
+            self.visited = max(self.visited, min(i, len(self.names) - 1))
+
+    def insert(self, i, path):
+        with self.lock:
+            self.names.insert(i, os.path.basename(path))
+            if i <= self.visited:
+                self.visited += 1
+
+    def stop(self):
+        self.stop_event.set()
+
+
+class SessionJournal:
+    """
+    분류 작업 기록 (폴더마다 JSONL 파일 하나, 추가만 함)
+    - log(op, **fields): 큐에 넣고 즉시 반환 → 기록 스레드가 모아서 write + fsync
+    - replay(): 기존 기록으로 (되돌리기 history, 마지막 위치 파일명) 복원
+    - op: move / skip / label_edit / undo / pos
+    """
+    def __init__(self, folder: str, flush_sec=JOURNAL_FLUSH_SEC):
+        self.path = os.path.join(folder, JOURNAL_FILE)
+        self.flush_sec = flush_sec
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._writer, name="journal", daemon=True)
+        self.thread.start()
+
+    def replay(self):
+        history = []
+        current = None
+        try:
+            f = open(self.path, "r", encoding="utf-8")
+        except OSError:
+            return history, current
+        with f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:  # 비정상 종료로 잘린 마지막 줄
+                    continue
+                op = rec.get("op")
+                if op == "move":
+                    history.append({
+                        "original_img": rec["original_img"],
+                        "moved_img": rec["moved_img"],
+                        "original_txt": rec.get("original_txt"),
+                        "moved_txt": rec.get("moved_txt"),
+                        "cls": rec.get("cls"),
+                        "prev_index": None,  # 이전 세션 기록 → 현재 위치에 다시 끼워 넣음
+                    })
+                elif op == "undo" and history:
+                    history.pop()
+                elif op == "pos":
+                    current = rec.get("current")
+        return history, current
+
+    def log(self, op: str, **fields):
+        rec = {"op": op, "time": round(time.time(), 3)}
+        rec.update(fields)
+        self.queue.put(json.dumps(rec, ensure_ascii=False) + "\n")
+
+    def _writer(self):
+        with open(self.path, "a", encoding="utf-8") as f:
+            while True:
+                line = self.queue.get()
+                if line is None:
+                    break
+                lines = [line]
+                deadline = time.time() + self.flush_sec
+                stop = False
+                # flush 주기 동안 들어온 기록을 모아서 한 번에 반영
+                while True:
+                    try:
+                        line = self.queue.get(timeout=max(0.0, deadline - time.time()))
+                    except queue.Empty:
+                        break
+                    if line is None:
+                        stop = True
+                        break
+                    lines.append(line)
+                try:
+                    f.write("".join(lines))
+                    f.flush()
+                    os.fsync(f.fileno())
+                except OSError as e:
+                    print(f"작업 기록 실패: {e}")
+                if stop:
+                    break
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join(timeout=5.0)
+
+
+def move_file(src: str, dst: str):
+    """ 같은 파일시스템이면 os.replace(이름 변경), 아니면 복사 후 원본 삭제 """
+    try:
+        os.replace(src, dst)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        tmp = dst + ".moving"
+        shutil.copy2(src, tmp)
+        os.replace(tmp, dst)  # 복사 도중 중단되어도 dst에 반쪽 파일이 남지 않음
+        os.unlink(src)
+
+
+class MoveJob:
+    """ FileMover 작업 하나 (이미지 + txt 처럼 같이 옮길 파일 묶음) """
+    PENDING, RUNNING, DONE, CANCELLED, FAILED = "pending", "running", "done", "cancelled", "failed"
+
+    def __init__(self, pairs, on_done=None, missing_ok=False):
+        self.pairs = pairs        # [(src, dst), ...] 순서대로 이동
+        self.on_done = on_done    # on_done(job) : 이동 스레드에서 호출
+        self.missing_ok = missing_ok  # 원본이 없는 항목은 건너뜀 (되돌리기용)
+        self.state = MoveJob.PENDING
+        self.error = None
+        self.finished = threading.Event()
+
+
+class FileMover:
+    """
+    백그라운드 파일 이동 (스레드 하나, 넣은 순서대로 처리)
+    - submit(pairs, on_done) → MoveJob, UI는 바로 다음 이미지로 진행
+    - cancel(job): 아직 시작 전이면 취소 (파일은 그대로)
+    - pending(): 처리 대기/진행 중인 작업 수, errors: 실패한 작업 목록
+    """
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.outstanding = 0
+        self.errors = []
+        self.thread = threading.Thread(target=self._worker, name="file-mover", daemon=True)
+        self.thread.start()
+
+    def submit(self, pairs, on_done=None, missing_ok=False):
+        job = MoveJob(pairs, on_done, missing_ok)
+        with self.lock:
+            self.outstanding += 1
+        self.queue.put(job)
+        return job
+
+    def cancel(self, job) -> bool:
+        with self.lock:
+            if job.state != MoveJob.PENDING:
+                return False
+            job.state = MoveJob.CANCELLED
+            return True
+
+    def pending(self) -> int:
+        with self.lock:
+            return self.outstanding
+
+    def _worker(self):
+        while True:
+            job = self.queue.get()
+            if job is None:
+                break
+            with self.lock:
+                cancelled = job.state == MoveJob.CANCELLED
+                if not cancelled:
+                    job.state = MoveJob.RUNNING
+            if not cancelled:
+                try:
+                    for src, dst in job.pairs:
+                        if job.missing_ok and not os.path.exists(src):
+                            continue
+                        move_file(src, dst)
+                    job.state = MoveJob.DONE
+                except OSError as e:
+                    job.state = MoveJob.FAILED
+                    job.error = e
+                    with self.lock:
+                        self.errors.append(job)
+                if callable(job.on_done):
+                    try:
+                        job.on_done(job)
+                    except Exception as e:
+                        print(f"이동 완료 처리 실패: {e}")
+            with self.lock:
+                self.outstanding -= 1
+            job.finished.set()
+
+    def flush(self):
+        """ 지금까지 넣은 작업이 모두 끝날 때까지 대기 """
+        marker = self.submit([])
+        marker.finished.wait()
+
+    def close(self):
+        self.flush()
+        self.queue.put(None)
+        self.thread.join(timeout=5.0)
+
+
+class BoxIndex:
+    """
+    박스 위치 격자 색인 (정규화 좌표 0~1 을 cells x cells 칸으로 나눔)
+    - 클릭 위치 칸에 걸친 박스만 검사 → 박스가 수천 개여도 선택이 빠름
+    - 좌표가 정규화 값이라 화면 크기/확대와 무관
+    """
+    def __init__(self, cells=32):
+        self.cells = cells
+        self.grid = {}   # (cx, cy) -> [박스 번호]
+        self.boxes = []  # 번호별 (x1, y1, x2, y2)
+
+    def _cell(self, v):
+        return max(0, min(self.cells - 1, int(v * self.cells)))
+
+    def rebuild(self, labels):
+        self.grid = {}
+        self.boxes = []
+        for cls, xc, yc, w, h in labels:
+            self.add((cls, xc, yc, w, h))
+
+    def add(self, label):
+        _, xc, yc, w, h = label
+        i = len(self.boxes)
+        box = (xc - w / 2, yc - h / 2, xc + w / 2, yc + h / 2)
+        self.boxes.append(box)
+        for cx in range(self._cell(box[0]), self._cell(box[2]) + 1):
+            for cy in range(self._cell(box[1]), self._cell(box[3]) + 1):
+                self.grid.setdefault((cx, cy), []).append(i)
+
+    def query(self, nx, ny):
+        """ (nx, ny) 를 포함하는 박스 중 가장 나중 것(화면 맨 위) 번호, 없으면 None """
+        best = None
+        for i in self.grid.get((self._cell(nx), self._cell(ny)), ()):
+            x1, y1, x2, y2 = self.boxes[i]
+            if x1 <= nx <= x2 and y1 <= ny <= y2 and (best is None or i > best):
+                best = i
+        return best
+
+
 class LabelEditorPopup:
     """
     팝업 라벨 편집기
@@ -69,13 +673,15 @@ class LabelEditorPopup:
     - 클릭: 박스 선택
     - BackSpace: 선택 박스 삭제
     - e: 선택 박스 클래스 수정
+    - 휠: 커서 위치 기준 확대/축소, 가운데 버튼 드래그: 이동, f: 전체 보기
     - 확인: 저장 후 닫기 / 취소: 닫기(저장 안 함)
     """
-    def __init__(self, parent, image_path: str, on_close_saved=None):
+    def __init__(self, parent, image_path: str, on_close_saved=None, thumb_cache=None):
         self.parent = parent
         self.image_path = image_path
         self.txt_path = yolo_txt_path(image_path)
         self.on_close_saved = on_close_saved
+        self.thumb_cache = thumb_cache
 
         self.top = Toplevel(parent)
         self.top.title(f"라벨 편집 - {os.path.basename(image_path)}")
@@ -97,7 +703,7 @@ class LabelEditorPopup:
 
         # 캔버스
         from tkinter import Canvas
-        self.canvas = Canvas(self.top, width=1450, height=860, bg="black")
+        self.canvas = Canvas(self.top, width=EDITOR_SIZE[0], height=EDITOR_SIZE[1], bg="black")
         self.canvas.pack(padx=8, pady=8)
 
         # 폰트
@@ -106,16 +712,35 @@ class LabelEditorPopup:
         except Exception:
             self.pil_font = ImageFont.load_default()
 
-        # 이미지/스케일
-        self.pil_orig = Image.open(image_path).convert("RGB")
+        # 이미지/스케일 (전체 보기는 캐시 축소본, 확대 시에만 원본 사용)
+        with Image.open(image_path) as im:
+            self.img_w, self.img_h = im.size  # 헤더만 읽음
+        self.pil_orig = None
+        self.orig_lock = threading.Lock()
+        self.pyramid = []     # [원본, 1/2, 1/4, ...] 확대 화면은 필요한 단계에서 보이는 부분만 잘라 씀
+        self.disp_cache = {}  # (cw, ch) -> 표시용 축소본
         self.disp_img = None
         self.tk_img = None
         self.disp_w = 0
         self.disp_h = 0
+        self.img_item = None
+
+        # 보기 변환 : 캔버스 x = (원본 x - off_x) * zoom
+        self.zoom = None
+        self.fit_zoom = 1.0
+        self.off_x = 0.0
+        self.off_y = 0.0
+        self.pan_start = None
+        self.render_pending = None
 
         # labels: list[(cls, xc, yc, w, h)] normalized
         self.labels = parse_yolo_txt(self.txt_path)
 
+        # 박스별 캔버스 항목 (rect_id, text_id) 은 계속 재사용, 클릭 판정은 격자 색인으로
+        self.box_items = []
+        self.box_index = BoxIndex()
+        self.box_index.rebuild(self.labels)
+
         # 선택/드래그 상태
         self.selected_idx = None
         self.drag_start = None
@@ -126,98 +751,266 @@ class LabelEditorPopup:
         self.canvas.bind("<B1-Motion>", self.on_mouse_move)
         self.canvas.bind("<ButtonRelease-1>", self.on_mouse_up)
         self.canvas.bind("<ButtonPress-3>", self.on_right_click_select)  # 우클릭 선택도 가능
+        self.canvas.bind("<MouseWheel>", self.on_wheel)  # Windows / macOS
+        self.canvas.bind("<Button-4>", self.on_wheel)    # Linux
+        self.canvas.bind("<Button-5>", self.on_wheel)
+        self.canvas.bind("<ButtonPress-2>", self.on_pan_start)
+        self.canvas.bind("<B2-Motion>", self.on_pan_move)
 
         self.top.bind("<BackSpace>", lambda e: self.delete_selected())
         self.top.bind("e", lambda e: self.edit_selected_class())
         self.top.bind("<Escape>", lambda e: self.cancel_temp())
+        self.top.bind("f", lambda e: self.zoom_fit())
 
         self.top.after(50, self.render)
+        # 확대가 바로 되도록 원본/피라미드는 백그라운드에서 미리 준비
+        fit = min(EDITOR_SIZE[0] / self.img_w, EDITOR_SIZE[1] / self.img_h)
+        levels = max(0, int(math.log2(max(1.0, 1 / fit))))
+        threading.Thread(target=self.pyramid_level, args=(levels,), name="editor-pyramid", daemon=True).start()
+
+    def canvas_size(self):
+        return max(self.canvas.winfo_width(), EDITOR_SIZE[0]), max(self.canvas.winfo_height(), EDITOR_SIZE[1])
 
     def render(self):
-        # 캔버스 크기에 맞춰 이미지 표시
-        cw = max(self.canvas.winfo_width(), 1450)
-        ch = max(self.canvas.winfo_height(), 860)
+        # 캔버스 크기/보기 변환에 맞춰 이미지 표시
+        self.render_pending = None
+        cw, ch = self.canvas_size()
+        # 화면보다 작은 이미지는 확대하지 않음 (1배로 표시, 확대는 휠로)
+        self.fit_zoom = min(1.0, cw / self.img_w, ch / self.img_h)
+        if self.zoom is None or self.zoom < self.fit_zoom:
+            self.zoom = self.fit_zoom
+        self.clamp_view(cw, ch)
+
+        if self.zoom <= self.fit_zoom * 1.0001:
+            img, pos = self.display_image(cw, ch), (0, 0)
+        else:
+            img, pos = self.view_image(cw, ch)
+
+        # 표시 이미지가 바뀐 경우에만 PhotoImage를 새로 만들고, 캔버스 항목은 그대로 재사용
+        if img is not self.disp_img:
+            self.disp_img = img
+            self.disp_w, self.disp_h = img.size
+            self.tk_img = ImageTk.PhotoImage(img)
+            if self.img_item is None:
+                self.img_item = self.canvas.create_image(0, 0, anchor="nw", image=self.tk_img, tags=("img",))
+                self.canvas.tag_lower(self.img_item)
+            else:
+                self.canvas.itemconfig(self.img_item, image=self.tk_img)
+        self.canvas.coords(self.img_item, *pos)
 
-        img = self.pil_orig.copy()
-        img.thumbnail((cw, ch), Image.LANCZOS)
+        self.draw_boxes()
+        self.update_info()
 
-        self.disp_img = img
-        self.disp_w, self.disp_h = img.size
+    def schedule_render(self):
+        # 휠/드래그 이벤트가 몰려도 한 번만 그림
+        if self.render_pending is None:
+            self.render_pending = self.top.after_idle(self.render)
+
+    def clamp_view(self, cw, ch):
+        # 이미지가 화면보다 크면 화면 안에 머물도록, 작으면 왼쪽 위 고정
+        vw, vh = cw / self.zoom, ch / self.zoom
+        self.off_x = 0.0 if vw >= self.img_w else max(0.0, min(self.img_w - vw, self.off_x))
+        self.off_y = 0.0 if vh >= self.img_h else max(0.0, min(self.img_h - vh, self.off_y))
+
+    def load_original(self):
+        with self.orig_lock:
+            if self.pil_orig is None:
+                self.pil_orig = Image.open(self.image_path).convert("RGB")
+            return self.pil_orig
+
+    def pyramid_level(self, level):
+        # level k = 원본의 1/2^k (필요한 단계까지 바로 앞 단계에서 reduce)
+        original = self.load_original()
+        with self.orig_lock:
+            if not self.pyramid:
+                self.pyramid.append(original)
+            while len(self.pyramid) <= level:
+                self.pyramid.append(self.pyramid[-1].reduce(2))
+            return self.pyramid[level]
+
+    def view_image(self, cw, ch):
+        """ 보이는 영역만 잘라서 표시 크기로 변환, return: (이미지, 캔버스 위치) """
+        x0, y0 = self.off_x, self.off_y
+        x1 = min(self.img_w, x0 + cw / self.zoom)
+        y1 = min(self.img_h, y0 + ch / self.zoom)
+
+        # 화면 1픽셀당 원본 픽셀 수 이상을 유지하는 가장 작은 단계
+        level = 0
+        while 2 ** (level + 1) <= 1 / self.zoom:
+            level += 1
+        src = self.pyramid_level(level)
+        sx, sy = self.img_w / src.width, self.img_h / src.height
+
+        box = (int(x0 / sx), int(y0 / sy), min(src.width, math.ceil(x1 / sx)), min(src.height, math.ceil(y1 / sy)))
+        crop = src.crop(box)
+        out_w = max(1, round((box[2] - box[0]) * sx * self.zoom))
+        out_h = max(1, round((box[3] - box[1]) * sy * self.zoom))
+        resample = Image.NEAREST if self.zoom >= 2 else Image.BILINEAR  # 크게 확대하면 픽셀 경계가 보이도록
+        img = crop.resize((out_w, out_h), resample)
+        return img, ((box[0] * sx - x0) * self.zoom, (box[1] * sy - y0) * self.zoom)
+
+    def zoom_at(self, x, y, factor):
+        # (x, y) 아래의 원본 위치가 그대로 남도록 확대/축소
+        ox, oy = x / self.zoom + self.off_x, y / self.zoom + self.off_y
+        zoom = max(self.fit_zoom, min(EDITOR_MAX_ZOOM, self.zoom * factor))
+        if zoom == self.zoom:
+            return
+        self.cancel_temp()
+        self.zoom = zoom
+        self.off_x, self.off_y = ox - x / zoom, oy - y / zoom
+        self.schedule_render()
 
-        self.tk_img = ImageTk.PhotoImage(img)
-        self.canvas.delete("all")
-        self.canvas.create_image(0, 0, anchor="nw", image=self.tk_img, tags=("img",))
+    def zoom_fit(self):
+        self.cancel_temp()
+        self.zoom = self.fit_zoom
+        self.off_x = self.off_y = 0.0
+        self.schedule_render()
 
-        self.draw_boxes()
-        self.update_info()
+    def on_wheel(self, event):
+        if self.zoom is None:
+            return
+        up = event.num == 4 or getattr(event, "delta", 0) > 0
+        self.zoom_at(event.x, event.y, 1.25 if up else 0.8)
+
+    def on_pan_start(self, event):
+        self.pan_start = (event.x, event.y, self.off_x, self.off_y)
+
+    def on_pan_move(self, event):
+        if self.pan_start is None or self.zoom is None:
+            return
+        x, y, off_x, off_y = self.pan_start
+        self.off_x = off_x - (event.x - x) / self.zoom
+        self.off_y = off_y - (event.y - y) / self.zoom
+        self.schedule_render()
+
+    def display_image(self, cw, ch):
+        # 같은 크기는 다시 축소하지 않음 (메모리 → 디스크 캐시 → 원본 순)
+        # 크기는 정확히 img_w*fit_zoom x img_h*fit_zoom → 박스 좌표 변환(zoom)과 같은 배율
+        size = (max(1, round(self.img_w * self.fit_zoom)), max(1, round(self.img_h * self.fit_zoom)))
+        img = self.disp_cache.get((cw, ch))
+        if img is None and self.thumb_cache is not None:
+            img = self.thumb_cache.get(self.image_path, (cw, ch))
+            if img is not None and img.size != size:  # 이전 방식으로 만든 캐시
+                img = None
+        if img is None:
+            img = self.load_original()
+            img = img.copy() if img.size == size else img.resize(size, Image.LANCZOS)
+            if self.thumb_cache is not None:
+                self.thumb_cache.put(self.image_path, (cw, ch), img)
+        self.disp_cache[(cw, ch)] = img
+        return img
 
     def update_info(self):
         base = os.path.basename(self.image_path)
         self.info_var.set(f"{base} | labels: {len(self.labels)} | txt: {'있음' if os.path.exists(self.txt_path) else '없음'}")
 
     def yolo_to_canvas(self, xc, yc, w, h):
-        x1 = (xc - w / 2) * self.disp_w
-        y1 = (yc - h / 2) * self.disp_h
-        x2 = (xc + w / 2) * self.disp_w
-        y2 = (yc + h / 2) * self.disp_h
+        x1, y1 = self.norm_to_canvas(xc - w / 2, yc - h / 2)
+        x2, y2 = self.norm_to_canvas(xc + w / 2, yc + h / 2)
         return x1, y1, x2, y2
 
     def canvas_to_yolo(self, x1, y1, x2, y2):
         x1, x2 = sorted([x1, x2])
         y1, y2 = sorted([y1, y2])
 
-        # clamp to image area
-        x1 = max(0, min(self.disp_w, x1))
-        x2 = max(0, min(self.disp_w, x2))
-        y1 = max(0, min(self.disp_h, y1))
-        y2 = max(0, min(self.disp_h, y2))
+        # 원본 좌표로 변환 후 clamp to image area
+        x1 = max(0.0, min(self.img_w, x1 / self.zoom + self.off_x))
+        x2 = max(0.0, min(self.img_w, x2 / self.zoom + self.off_x))
+        y1 = max(0.0, min(self.img_h, y1 / self.zoom + self.off_y))
+        y2 = max(0.0, min(self.img_h, y2 / self.zoom + self.off_y))
 
-        bw = max(1.0, x2 - x1)
-        bh = max(1.0, y2 - y1)
+        # 최소 크기 : 화면 1픽셀
+        bw = max(1.0 / self.zoom, x2 - x1)
+        bh = max(1.0 / self.zoom, y2 - y1)
 
-        xc = (x1 + x2) / 2 / self.disp_w
-        yc = (y1 + y2) / 2 / self.disp_h
-        w = bw / self.disp_w
-        h = bh / self.disp_h
+        xc = (x1 + x2) / 2 / self.img_w
+        yc = (y1 + y2) / 2 / self.img_h
+        w = bw / self.img_w
+        h = bh / self.img_h
         return xc, yc, w, h
 
-    def draw_boxes(self):
-        self.canvas.delete("box")
-        for i, (cls, xc, yc, w, h) in enumerate(self.labels):
-            x1, y1, x2, y2 = self.yolo_to_canvas(xc, yc, w, h)
-            outline = "yellow" if i == self.selected_idx else "red"
-            width = 3 if i == self.selected_idx else 2
+    def norm_to_canvas(self, nx, ny):
+        return (nx * self.img_w - self.off_x) * self.zoom, (ny * self.img_h - self.off_y) * self.zoom
 
-            rect_id = self.canvas.create_rectangle(x1, y1, x2, y2, outline=outline, width=width, tags=("box", f"box_{i}"))
-            self.canvas.tag_bind(rect_id, "<ButtonPress-1>", lambda e, idx=i: self.select_box(idx))
+    def image_extent(self):
+        """ 캔버스에서 이미지가 보이는 범위 (x1, y1, x2, y2) """
+        cw, ch = self.canvas_size()
+        x1, y1 = self.norm_to_canvas(0, 0)
+        x2, y2 = self.norm_to_canvas(1, 1)
+        return max(0, x1), max(0, y1), min(cw, x2), min(ch, y2)
 
-            # 클래스 텍스트
-            text_id = self.canvas.create_text(x1 + 4, max(10, y1 + 10), anchor="nw", fill="white",
-                                              text=str(cls), tags=("box", f"box_{i}"))
-            self.canvas.tag_bind(text_id, "<ButtonPress-1>", lambda e, idx=i: self.select_box(idx))
+    def in_image(self, x, y):
+        if self.zoom is None:
+            return False
+        x1, y1, x2, y2 = self.image_extent()
+        return x1 <= x <= x2 and y1 <= y <= y2
+
+    def clamp_to_image(self, x, y):
+        x1, y1, x2, y2 = self.image_extent()
+        return max(x1, min(x2, x)), max(y1, min(y2, y))
+
+    def draw_boxes(self):
+        # 박스 항목이 없으면 만들고, 있으면 좌표만 갱신 (표시 크기가 바뀐 경우)
+        for i, label in enumerate(self.labels):
+            if i < len(self.box_items):
+                self.place_box(i)
+            else:
+                self.create_box_item(label)
+
+    def create_box_item(self, label):
+        i = len(self.box_items)
+        cls, xc, yc, w, h = label
+        x1, y1, x2, y2 = self.yolo_to_canvas(xc, yc, w, h)
+        outline, width = self.box_style(i)
+        rect_id = self.canvas.create_rectangle(x1, y1, x2, y2, outline=outline, width=width, tags=("box",))
+        # 클래스 텍스트
+        text_id = self.canvas.create_text(x1 + 4, max(10, y1 + 10), anchor="nw", fill="white",
+                                          text=str(cls), tags=("box",))
+        self.box_items.append((rect_id, text_id))
+
+    def place_box(self, i):
+        cls, xc, yc, w, h = self.labels[i]
+        x1, y1, x2, y2 = self.yolo_to_canvas(xc, yc, w, h)
+        rect_id, text_id = self.box_items[i]
+        self.canvas.coords(rect_id, x1, y1, x2, y2)
+        self.canvas.coords(text_id, x1 + 4, max(10, y1 + 10))
+
+    def box_style(self, i):
+        return ("yellow", 3) if i == self.selected_idx else ("red", 2)
+
+    def restyle_box(self, i):
+        if i is None or not (0 <= i < len(self.box_items)):
+            return
+        outline, width = self.box_style(i)
+        rect_id, text_id = self.box_items[i]
+        self.canvas.itemconfig(rect_id, outline=outline, width=width)
+        if i == self.selected_idx:
+            self.canvas.tag_raise(rect_id)
+            self.canvas.tag_raise(text_id)
 
     def select_box(self, idx):
-        self.selected_idx = idx
-        self.draw_boxes()
+        # 선택이 바뀐 두 박스만 다시 칠함
+        prev, self.selected_idx = self.selected_idx, idx
+        if prev != idx:
+            self.restyle_box(prev)
+            self.restyle_box(idx)
+
+    def canvas_to_norm(self, x, y):
+        return (x / self.zoom + self.off_x) / self.img_w, (y / self.zoom + self.off_y) / self.img_h
 
     def find_box_at(self, x, y):
-        # 클릭 위치가 어떤 박스 안인지 찾기(뒤에서부터: 마지막이 위에)
-        for i in range(len(self.labels) - 1, -1, -1):
-            cls, xc, yc, w, h = self.labels[i]
-            x1, y1, x2, y2 = self.yolo_to_canvas(xc, yc, w, h)
-            if x1 <= x <= x2 and y1 <= y <= y2:
-                return i
-        return None
+        # 클릭 위치가 어떤 박스 안인지 찾기(겹치면 마지막이 위에)
+        return self.box_index.query(*self.canvas_to_norm(x, y))
 
     def on_right_click_select(self, event):
-        if event.x < 0 or event.y < 0 or event.x > self.disp_w or event.y > self.disp_h:
+        if not self.in_image(event.x, event.y):
             return
         idx = self.find_box_at(event.x, event.y)
         if idx is not None:
             self.select_box(idx)
 
     def on_mouse_down(self, event):
-        if event.x < 0 or event.y < 0 or event.x > self.disp_w or event.y > self.disp_h:
+        if not self.in_image(event.x, event.y):
             return
 
         # 이미 박스 위면 선택만 하고, 드래그 생성은 "빈 곳"에서만 시작하도록
@@ -227,8 +1020,7 @@ class LabelEditorPopup:
             self.drag_start = None
             return
 
-        self.selected_idx = None
-        self.draw_boxes()
+        self.select_box(None)
 
         self.drag_start = (event.x, event.y)
         self.temp_rect_id = self.canvas.create_rectangle(event.x, event.y, event.x, event.y,
@@ -238,8 +1030,7 @@ class LabelEditorPopup:
         if not self.drag_start or not self.temp_rect_id:
             return
         x0, y0 = self.drag_start
-        x1 = max(0, min(self.disp_w, event.x))
-        y1 = max(0, min(self.disp_h, event.y))
+        x1, y1 = self.clamp_to_image(event.x, event.y)
         self.canvas.coords(self.temp_rect_id, x0, y0, x1, y1)
 
     def on_mouse_up(self, event):
@@ -247,8 +1038,7 @@ class LabelEditorPopup:
             return
 
         x0, y0 = self.drag_start
-        x1 = max(0, min(self.disp_w, event.x))
-        y1 = max(0, min(self.disp_h, event.y))
+        x1, y1 = self.clamp_to_image(event.x, event.y)
 
         # 작은 박스 무시
         if abs(x1 - x0) < 5 or abs(y1 - y0) < 5:
@@ -263,10 +1053,11 @@ class LabelEditorPopup:
 
         xc, yc, w, h = self.canvas_to_yolo(x0, y0, x1, y1)
         self.labels.append((cls, xc, yc, w, h))
-        self.selected_idx = len(self.labels) - 1
+        self.box_index.add(self.labels[-1])
+        self.create_box_item(self.labels[-1])
 
         self.cancel_temp()
-        self.draw_boxes()
+        self.select_box(len(self.labels) - 1)
         self.update_info()
 
     def cancel_temp(self):
@@ -280,8 +1071,10 @@ class LabelEditorPopup:
             return
         if 0 <= self.selected_idx < len(self.labels):
             self.labels.pop(self.selected_idx)
+            for item_id in self.box_items.pop(self.selected_idx):
+                self.canvas.delete(item_id)
+            self.box_index.rebuild(self.labels)  # 번호가 당겨지므로 색인만 다시 만듦
         self.selected_idx = None
-        self.draw_boxes()
         self.update_info()
 
     def edit_selected_class(self):
@@ -293,7 +1086,7 @@ class LabelEditorPopup:
             return
         new_cls = str(new_cls).strip()
         self.labels[self.selected_idx] = (new_cls, xc, yc, w, h)
-        self.draw_boxes()
+        self.canvas.itemconfig(self.box_items[self.selected_idx][1], text=new_cls)
 
     def save_and_close(self):
         try:
@@ -314,19 +1107,232 @@ class LabelEditorPopup:
         self.top.destroy()
 
 
+class GridReviewPopup:
+    """
+    그리드 검토 (현재 위치부터 행x열 장씩)
+    - 클릭: 칸 선택/해제, a: 전체 선택/해제
+    - 숫자: 선택한 칸을 보낼 분류 지정 (기본: 분류기에서 선택된 분류)
+    - Enter/Space: 선택한 칸 → 지정 분류, 나머지 → 첫 번째 분류(OK) 로 한 번에 이동
+    - p: 이 페이지 통과, z: 되돌리기, Esc: 닫기
+    - 칸 이미지는 백그라운드에서 읽어 한 장으로 합친 뒤 표시, 다음 페이지는 미리 읽음
+    """
+    def __init__(self, app, shape=GRID_SHAPE, tile=GRID_TILE):
+        self.app = app
+        self.rows, self.cols = shape
+        self.tile = tile
+        self.per_page = self.rows * self.cols
+        self.page_paths = []
+        self.selected = set()
+        self.target = app.status.get()
+        self.generation = 0
+        self.closed = False
+        self.sheet_future = None
+        self.failed = set()  # 로드 실패 타일 (아무도 보지 않았으므로 이동하지 않음)
+        self.tk_img = None
+
+        self.tile_cache = PreviewCache(loader=lambda path: load_preview(path, app.thumb_cache, tile),
+                                       max_items=self.per_page * 3, workers=4)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="grid-page")
+        try:
+            self.pil_font = ImageFont.truetype("NanumGothic.ttf", 14)
+        except Exception:
+            self.pil_font = ImageFont.load_default()
+
+        self.top = Toplevel(app.root)
+        self.top.title("그리드 검토 (클릭: 선택 / 숫자: 분류 지정 / Enter: 선택→분류, 나머지→첫 분류 / p: 통과 / z: 되돌리기)")
+        self.top.transient(app.root)
+        self.top.grab_set()
+
+        header = Frame(self.top)
+        header.pack(fill="x", padx=8, pady=8)
+        Button(header, text="적용(Enter)", command=self.apply_page, width=12).pack(side="left", padx=6)
+        Button(header, text="통과(p)", command=self.skip_page, width=8).pack(side="left", padx=6)
+        Button(header, text="되돌리기(z)", command=self.undo, width=10).pack(side="left", padx=6)
+        Button(header, text="닫기", command=self.close, width=8).pack(side="left", padx=6)
+        self.info_var = StringVar(value="")
+        Label(header, textvariable=self.info_var).pack(side="left", padx=12)
+
+        from tkinter import Canvas
+        self.canvas = Canvas(self.top, width=self.cols * tile[0], height=self.rows * tile[1], bg="black")
+        self.canvas.pack(padx=8, pady=8)
+        self.canvas.bind("<ButtonPress-1>", self.on_click)
+
+        self.top.bind("<Return>", lambda e: self.apply_page())
+        self.top.bind("<space>", lambda e: self.apply_page())
+        self.top.bind("p", lambda e: self.skip_page())
+        self.top.bind("z", lambda e: self.undo())
+        self.top.bind("a", lambda e: self.toggle_all())
+        self.top.bind("<Escape>", lambda e: self.close())
+        for key in CLASS_KEYS:
+            self.top.bind(key, lambda e, k=key: self.set_target(k))
+        self.top.protocol("WM_DELETE_WINDOW", self.close)
+
+        self.load_page()
+
+    def load_page(self):
+        app = self.app
+        if app.current_index >= len(app.image_paths) and app.scanning():
+            self.info_var.set("이미지 목록 읽는 중...")
+            self.top.after(100, self.load_page)
+            return
+        start = app.current_index
+        self.page_paths = app.image_paths[start:start + self.per_page]
+        app.image_paths.pin(start + len(self.page_paths) - 1)
+        self.selected = set()
+        self.failed = set()
+        self.generation += 1
+        self.canvas.delete("all")
+        if not self.page_paths:
+            app.log_position(None)
+            self.info_var.set("모든 이미지 분류 완료!")
+            return
+        app.log_position(os.path.basename(self.page_paths[0]))  # 재시작 시 이 페이지 첫 이미지부터 (select_folder → FolderIndex resume_name)
+        self.update_info()
+        # 페이지 합성은 백그라운드, 다음 페이지는 미리 읽기
+        self.sheet_future = self.executor.submit(self.compose_sheet, list(self.page_paths), app.show_labels.get() == "ON")
+        self.tile_cache.prefetch(app.image_paths[start + self.per_page:start + 2 * self.per_page])
+        self.top.after(20, self.poll_sheet, self.generation)
+
+    def compose_sheet(self, paths, show_labels):
+        """ return: (페이지 이미지, 로드 실패 타일 번호 set) """
+        tw, th = self.tile
+        sheet = Image.new("RGB", (self.cols * tw, self.rows * th), "black")
+        draw = ImageDraw.Draw(sheet)
+        failed = set()
+        for i, path in enumerate(paths):
+            x, y = (i % self.cols) * tw, (i // self.cols) * th
+            try:
+                img, labels = self.tile_cache.get(path)
+            except Exception:
+                draw.text((x + 10, y + 10), f"로드 실패\n{os.path.basename(path)}", fill="red", font=self.pil_font)
+                failed.add(i)
+                continue
+            if labels and show_labels:
+                img = self.app._draw_labels_on_image(img.copy(), labels)
+            sheet.paste(img, (x, y))
+            draw.text((x + 4, y + th - 18), os.path.basename(path), fill="yellow", font=self.pil_font)
+        return sheet, failed
+
+    def poll_sheet(self, generation):
+        if generation != self.generation:
+            return  # 이미 다른 페이지로 넘어감
+        if not self.sheet_future.done():
+            self.top.after(20, self.poll_sheet, generation)
+            return
+        sheet, self.failed = self.sheet_future.result()
+        self.selected -= self.failed
+        self.tk_img = ImageTk.PhotoImage(sheet)
+        self.canvas.create_image(0, 0, anchor="nw", image=self.tk_img, tags=("sheet",))
+        self.draw_selection()
+
+    def draw_selection(self):
+        tw, th = self.tile
+        self.canvas.delete("sel")
+        for i in self.selected:
+            x, y = (i % self.cols) * tw, (i // self.cols) * th
+            self.canvas.create_rectangle(x + 2, y + 2, x + tw - 2, y + th - 2, outline="cyan", width=4, tags=("sel",))
+        self.update_info()
+
+    def update_info(self):
+        app = self.app
+        self.info_var.set(f"{app.current_index + 1}~{app.current_index + len(self.page_paths)} / {len(app.image_paths)}"
+                          f"  |  선택 {len(self.selected)}개 → {self.target}  /  나머지 → {app.classes[0]['name']}"
+                          + (f"  /  로드 실패 {len(self.failed)}개 (이동 안 함)" if self.failed else ""))
+
+    def on_click(self, event):
+        i = (event.y // self.tile[1]) * self.cols + event.x // self.tile[0]
+        if 0 <= i < len(self.page_paths) and i not in self.failed:
+            self.selected ^= {i}
+            self.draw_selection()
+
+    def toggle_all(self):
+        loaded = set(range(len(self.page_paths))) - self.failed
+        self.selected = set() if self.selected == loaded else loaded
+        self.draw_selection()
+
+    def set_target(self, key):
+        for c in self.app.classes:
+            if c["key"] == key:
+                self.target = c["name"]
+        self.update_info()
+
+    def apply_page(self):
+        app = self.app
+        if not self.page_paths or self.sheet_future is None or not self.sheet_future.done() \
+                or app.undo_pending is not None:
+            return
+        # 이동은 FileMover에 순서대로 넘기고 바로 다음 페이지로
+        for i, path in enumerate(self.page_paths):
+            if i not in self.failed:  # 로드 실패 타일은 폴더에 그대로 두고 다음에 다시 표시
+                name = self.target if i in self.selected else app.classes[0]["name"]
+                app.move_image(app.current_index, name)
+            app.current_index += 1
+        app.update_class_buttons()
+        self.load_page()
+
+    def skip_page(self):
+        if self.app.undo_pending is not None:
+            return
+        for path in self.page_paths:
+            self.app.journal.log("skip", img=path)
+        self.app.current_index += len(self.page_paths)
+        self.load_page()
+
+    def undo(self):
+        self.app.undo_last(reload=False, then=self._after_undo)
+
+    def _after_undo(self):
+        # 되돌리기가 팝업을 닫은 뒤에 끝났으면 분류 화면만 갱신
+        if self.closed:
+            self.app.load_image()
+        else:
+            self.load_page()
+
+    def close(self):
+        self.closed = True
+        self.generation += 1
+        self.tile_cache.shutdown()
+        self.executor.shutdown(wait=False)
+        try:
+            self.top.grab_release()
+        except Exception:
+            pass
+        self.top.destroy()
+        self.app.load_image()
+
+
 class ImageClassifier:
-    def __init__(self, root):
+    def __init__(self, root, classes=None):
         self.root = root
-        self.root.title("이미지 분류기 (Space: 이미지 이동 / 화살표: 유형 변경 / p: 통과 / z: 실행취소)")
+        self.root.title("이미지 분류기 (숫자: 해당 분류로 이동 / Space: 선택 분류로 이동 / ←/→: 첫째/둘째 분류 선택 / ↑↓: 분류 변경 / p: 통과 / z: 실행취소)")
+
+        # 분류 목록 (폴더에 img_sorter_classes.json 이 있으면 폴더 선택 시 교체)
+        self.default_classes = classes or make_classes(DEFAULT_CLASSES)
+        self.classes = self.default_classes
+        self.class_counts = {}
+        self.class_buttons = []
 
-        self.image_paths = []
+        self.image_paths = []  # 폴더 선택 후 FolderIndex
         self.current_index = 0
         self.selected_folder = ""
+        self.scan_wait = None
 
         # history: dict(original_img, moved_img, original_txt, moved_txt, prev_index)
+        # 폴더의 작업 기록(journal)에서 복원되므로 세션이 바뀌어도 되돌리기 가능
         self.history = []
+        self.journal = None
+        self.last_pos = None
+        self.undo_pending = None  # (반대 이동 job, history item, reload, then) 완료 대기 중인 되돌리기
+
+        # 파일 이동은 백그라운드에서 (NAS 등 느린 경로에서도 UI는 바로 다음 이미지로)
+        self.mover = FileMover()
+        self.move_errors_shown = 0
 
-        self.status = StringVar(value="OK")
+        # 다음/이전 이미지 미리 읽기 (축소본은 디스크 캐시에도 보관)
+        self.thumb_cache = open_thumb_cache()
+        self.preview_cache = PreviewCache(loader=lambda path: load_preview(path, self.thumb_cache))
+
+        self.status = StringVar(value=self.classes[0]["name"])
         self.custom_font = tkFont.Font(family="NanumGothic", size=16)
 
         # 폰트 (라벨 텍스트용)
@@ -343,6 +1349,10 @@ class ImageClassifier:
         self.edit_label_button = Button(root, text="라벨 편집(팝업)", command=self.open_label_editor, font=self.custom_font)
         self.edit_label_button.pack()
 
+        # 그리드 검토 버튼
+        self.grid_button = Button(root, text="그리드 검토 (g)", command=self.open_grid_review, font=self.custom_font)
+        self.grid_button.pack()
+
         # 이미지 라벨
         self.image_label = Label(root, font=self.custom_font)
         self.image_label.pack()
@@ -363,10 +1373,7 @@ class ImageClassifier:
                                     font=self.custom_font)
         self.toggle_button.pack()
 
-        self.ok_radio = Radiobutton(self.radio_frame, text="OK (←)", variable=self.status, value="OK", font=self.custom_font)
-        self.ng_radio = Radiobutton(self.radio_frame, text="NG (→)", variable=self.status, value="NG", font=self.custom_font)
-        self.ok_radio.pack(in_=self.radio_frame, side="left", padx=50)
-        self.ng_radio.pack(in_=self.radio_frame, side="left", padx=50)
+        self.build_class_buttons()
 
         # 되돌리기 버튼
         self.undo_button = Button(root, text="되돌리기", command=self.undo_last, font=self.custom_font)
@@ -378,32 +1385,99 @@ class ImageClassifier:
 
         # 키보드 바인딩
         self.root.bind("<space>", self.classify_image)
-        self.root.bind("<Left>", lambda e: self.status.set("OK"))
-        self.root.bind("<Right>", lambda e: self.status.set("NG"))
-        self.root.bind("q", lambda e: self.root.destroy())
+        self.root.bind("<Left>", lambda e: self.select_class(0))   # 기존처럼 ← = 첫 분류(OK), → = 둘째 분류(NG)
+        self.root.bind("<Right>", lambda e: self.select_class(1))
+        self.root.bind("<Up>", lambda e: self.cycle_class(-1))     # 분류가 많을 때 순환 선택
+        self.root.bind("<Down>", lambda e: self.cycle_class(1))
+        for key in CLASS_KEYS:
+            self.root.bind(key, lambda e, k=key: self.classify_by_key(k))
+        self.root.bind("q", lambda e: self.quit())
         self.root.bind("p", lambda e: self.skip_image())
         self.root.bind("z", lambda e: self.undo_last())
         self.root.bind("e", lambda e: self.open_label_editor())  # 단축키로도 편집
         self.root.bind("l", lambda e: self.toggle_labels()) # 라벨 토글 단축키
+        self.root.bind("g", lambda e: self.open_grid_review())
+
+        self.root.protocol("WM_DELETE_WINDOW", self.quit)  # 창 닫기도 남은 이동 / 작업 기록 정리
+        self.root.after(200, self.poll_mover)
 
     def select_folder(self):
-        self.selected_folder = filedialog.askdirectory()
-        if not self.selected_folder:
+        folder = filedialog.askdirectory()
+        if not folder:
             return
-
-        self.image_paths = sorted([
-            os.path.join(self.selected_folder, f)
-            for f in os.listdir(self.selected_folder)
-            if f.lower().endswith(IMG_EXTS)
-        ])
+        self.close_folder()
+        self.selected_folder = folder
+
+        # 작업 기록에서 되돌리기 목록과 마지막 위치 복원 → 그 위치부터 폴더 전체 백그라운드 스캔
+        # (앞선 이미지는 끝까지 간 뒤 다시 나오므로 통과(p)했거나 못 본 이미지도 빠지지 않음)
+        self.journal = SessionJournal(self.selected_folder)
+        self.history, self.last_pos = self.journal.replay()
+        self.image_paths = FolderIndex(self.selected_folder, resume_name=self.last_pos)
+        self.image_paths.wait_first(timeout=2.0)
         self.current_index = 0
-        self.history = []
+        self.preview_cache.clear()
 
-        os.makedirs(os.path.join(self.selected_folder, "OK"), exist_ok=True)
-        os.makedirs(os.path.join(self.selected_folder, "NG"), exist_ok=True)
+        self.classes = self.default_classes
+        classes_path = os.path.join(self.selected_folder, CLASSES_FILE)
+        if os.path.exists(classes_path):
+            try:
+                self.classes = load_classes(classes_path)
+            except (OSError, ValueError, KeyError) as e:
+                messagebox.showerror("분류 목록 오류", f"{classes_path}: {e}")
+        for c in self.classes:
+            os.makedirs(self.class_dir(c), exist_ok=True)
+        self.count_history()
+        self.build_class_buttons()
 
         self.load_image()
 
+    def class_dir(self, c):
+        return os.path.join(self.selected_folder, c["dir"])  # dir이 절대 경로면 그대로 사용
+
+    def build_class_buttons(self):
+        for button in self.class_buttons:
+            button.destroy()
+        self.class_buttons = []
+        names = [c["name"] for c in self.classes]
+        if self.status.get() not in names:
+            self.status.set(names[0])
+        for c in self.classes:
+            button = Radiobutton(self.radio_frame, variable=self.status, value=c["name"], font=self.custom_font)
+            button.pack(in_=self.radio_frame, side="left", padx=30)
+            self.class_buttons.append(button)
+        self.update_class_buttons()
+
+    def update_class_buttons(self):
+        # 분류별 이동 수 표시
+        for i, (c, button) in enumerate(zip(self.classes, self.class_buttons)):
+            keys = c["key"] + ARROW_HINTS.get(i, "")
+            button.config(text=f"{c['name']} ({keys}) : {self.class_counts.get(c['name'], 0)}")
+
+    def count_history(self):
+        # 작업 기록(되돌리지 않은 이동)으로 분류별 수 복원
+        by_dir = {os.path.normpath(self.class_dir(c)): c["name"] for c in self.classes}
+        self.class_counts = {c["name"]: 0 for c in self.classes}
+        for item in self.history:
+            name = item.get("cls") or by_dir.get(os.path.normpath(os.path.dirname(item["moved_img"])))
+            if name in self.class_counts:
+                self.class_counts[name] += 1
+
+    def select_class(self, i):
+        if i < len(self.classes):
+            self.status.set(self.classes[i]["name"])
+
+    def cycle_class(self, step):
+        names = [c["name"] for c in self.classes]
+        i = names.index(self.status.get()) if self.status.get() in names else 0
+        self.status.set(names[(i + step) % len(names)])
+
+    def classify_by_key(self, key):
+        for c in self.classes:
+            if c["key"] == key:
+                self.status.set(c["name"])
+                self.classify_image()
+                return
+
     def _draw_labels_on_image(self, img: Image.Image, labels):
         if not labels:
             return img
@@ -437,32 +1511,42 @@ class ImageClassifier:
 
         return img
 
+    def scanning(self):
+        return isinstance(self.image_paths, FolderIndex) and not self.image_paths.done
+
     def load_image(self):
+        if self.current_index >= len(self.image_paths) and self.scanning():
+            # 아직 발견되지 않은 위치 → 스캔 진행을 기다렸다가 다시 표시
+            self.image_label.config(image="", text="이미지 목록 읽는 중...", font=self.custom_font)
+            self.progress_label.config(text=f"{self.current_index} / {len(self.image_paths)}+ (스캔 중)")
+            if self.scan_wait is None:
+                self.scan_wait = self.root.after(100, self._retry_load)
+            return
         if self.current_index >= len(self.image_paths):
+            self.log_position(None)  # 끝까지 검토 → 다음에는 처음부터
             self.image_label.config(image="", text="모든 이미지 분류 완료!", font=self.custom_font)
             self.label_info.config(text="")
             self.progress_label.config(text="작업이 완료되었습니다.")
             return
 
         image_path = self.image_paths[self.current_index]
+        self.log_position(os.path.basename(image_path))
 
         try:
-            img = Image.open(image_path).convert("RGB")
-            img = img.resize((1280, 1024))
+            img, labels = self.preview_cache.get(image_path)
         except Exception as e:
             self.label_info.config(text=f"이미지 로드 실패: {os.path.basename(image_path)} ({e})")
             self.current_index += 1
             self.load_image()
             return
 
-        img.thumbnail((1000, 1000), Image.LANCZOS)
+        self.prefetch_neighbors()
 
         # 라벨 오버레이 표시(토글 반영)
         txt_path = yolo_txt_path(image_path)
-        labels = parse_yolo_txt(txt_path) if os.path.exists(txt_path) else []
 
         if labels and self.show_labels.get() == "ON":
-            img = self._draw_labels_on_image(img, labels)
+            img = self._draw_labels_on_image(img.copy(), labels)  # 캐시 원본은 그대로 유지
             self.label_info.config(text=f"라벨: {os.path.basename(txt_path)} / {len(labels)}개 (표시 ON)")
         else:
             if labels:
@@ -472,7 +1556,68 @@ class ImageClassifier:
 
         self.tk_img = ImageTk.PhotoImage(img)
         self.image_label.config(image=self.tk_img, text="")
-        self.progress_label.config(text=f"{self.current_index + 1} / {len(self.image_paths)}")
+        self.update_progress()
+
+    def update_progress(self):
+        if self.current_index >= len(self.image_paths):
+            return
+        total = f"{len(self.image_paths)}+ (스캔 중)" if self.scanning() else f"{len(self.image_paths)}"
+        text = f"{self.current_index + 1} / {total}"
+        pending = self.mover.pending()
+        if pending:
+            text += f"  |  이동 대기 {pending}"
+        self.progress_label.config(text=text)
+
+    def poll_mover(self):
+        # 이동 대기 수 / 실패 표시 갱신, 늦게 끝난 되돌리기 마무리 (Tk는 메인 스레드에서만 갱신)
+        if self.undo_pending is not None and self.undo_pending[0].finished.is_set():
+            _, item, reload, then = self.undo_pending
+            self.undo_pending = None
+            self._finish_undo(item, reload, then)
+        self.update_progress()
+        errors = self.mover.errors
+        if len(errors) > self.move_errors_shown:
+            job = errors[-1]
+            self.move_errors_shown = len(errors)
+            messagebox.showerror("이동 실패", f"{os.path.basename(job.pairs[0][0])}: {job.error}")
+        self.root.after(200, self.poll_mover)
+
+    def _retry_load(self):
+        self.scan_wait = None
+        self.load_image()
+
+    def log_position(self, name):
+        # 위치가 바뀔 때만 기록 (재시작 시 이 파일부터 이어서 진행)
+        if self.journal is not None and name != self.last_pos:
+            self.journal.log("pos", current=name)
+            self.last_pos = name
+
+    def close_folder(self):
+        # 스캔 중지, 남은 이동 완료 후 작업 기록 반영
+        if isinstance(self.image_paths, FolderIndex):
+            self.image_paths.stop()
+        self.mover.flush()
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+        if self.scan_wait is not None:
+            self.root.after_cancel(self.scan_wait)
+            self.scan_wait = None
+
+    def prefetch_neighbors(self):
+        start = max(0, self.current_index - PREFETCH_BEHIND)
+        end = min(len(self.image_paths), self.current_index + 1 + PREFETCH_AHEAD)
+        # 다음 이미지부터 먼저 읽도록 순서 지정
+        paths = self.image_paths[self.current_index + 1:end] + self.image_paths[start:self.current_index]
+        self.preview_cache.prefetch(paths)
+
+    def quit(self):
+        self.close_folder()
+        self.mover.close()
+        self.preview_cache.shutdown()
+        if self.thumb_cache is not None:
+            self.thumb_cache.close()
+        self.root.destroy()
 
     def open_label_editor(self):
         if self.current_index >= len(self.image_paths):
@@ -480,70 +1625,126 @@ class ImageClassifier:
         image_path = self.image_paths[self.current_index]
 
         # 팝업 닫고 저장되면 분류기 화면 라벨 표시도 갱신
-        LabelEditorPopup(self.root, image_path, on_close_saved=self.load_image)
+        LabelEditorPopup(self.root, image_path, on_close_saved=lambda: self.on_labels_saved(image_path),
+                         thumb_cache=self.thumb_cache)
+
+    def open_grid_review(self):
+        if not self.selected_folder:
+            return
+        GridReviewPopup(self)
+
+    def on_labels_saved(self, image_path):
+        if self.journal is not None:
+            labels_count = len(parse_yolo_txt(yolo_txt_path(image_path)))
+            self.journal.log("label_edit", img=image_path, txt=yolo_txt_path(image_path), labels=labels_count)
+        self.load_image()
 
     def classify_image(self, event=None):
-        if self.current_index >= len(self.image_paths):
+        if self.current_index >= len(self.image_paths) or self.undo_pending is not None:
             return
 
-        current_image = self.image_paths[self.current_index]
-        target_dir = os.path.join(self.selected_folder, self.status.get())
+        self.move_image(self.current_index, self.status.get())
+        self.update_class_buttons()
+
+        self.current_index += 1
+        self.load_image()
+
+    def move_image(self, index, class_name):
+        """ index 위치 이미지(+txt)를 분류 폴더로 이동 요청 (FileMover) 후 되돌리기 목록에 추가 """
+        current_image = self.image_paths[index]
+        cls = next(c for c in self.classes if c["name"] == class_name)
+        target_dir = self.class_dir(cls)
         moved_img_path = os.path.join(target_dir, os.path.basename(current_image))
 
         original_txt = yolo_txt_path(current_image)
         moved_txt_path = None
-
-        shutil.move(current_image, moved_img_path)
-
+        pairs = [(current_image, moved_img_path)]
         if os.path.exists(original_txt):
             moved_txt_path = os.path.join(target_dir, os.path.basename(original_txt))
-            try:
-                shutil.move(original_txt, moved_txt_path)
-            except Exception:
-                moved_txt_path = None
+            pairs.append((original_txt, moved_txt_path))
 
-        self.history.append({
+        item = {
             "original_img": current_image,
             "moved_img": moved_img_path,
-            "original_txt": original_txt if moved_txt_path else (original_txt if os.path.exists(original_txt) else None),
+            "original_txt": original_txt if moved_txt_path else None,
             "moved_txt": moved_txt_path,
-            "prev_index": self.current_index
-        })
-
-        self.current_index += 1
-        self.load_image()
+            "cls": cls["name"],
+            "prev_index": index
+        }
+        # 이동은 백그라운드에서, 작업 기록은 이동이 끝난 뒤에 남김
+        journal = self.journal
+        record = {k: v for k, v in item.items() if k != "prev_index"}
+
+        def on_done(job):
+            if job.state == MoveJob.DONE:
+                journal.log("move", **record)
+
+        item["job"] = self.mover.submit(pairs, on_done)
+        self.history.append(item)
+        self.class_counts[cls["name"]] = self.class_counts.get(cls["name"], 0) + 1
+        return item
 
     def skip_image(self):
-        if self.current_index < len(self.image_paths):
+        if self.current_index < len(self.image_paths) and self.undo_pending is None:
+            self.journal.log("skip", img=self.image_paths[self.current_index])
             self.current_index += 1
             self.load_image()
 
-    def undo_last(self):
-        if not self.history:
+    def undo_last(self, reload=True, then=None):
+        """ 마지막 이동 되돌리기 (반대 이동이 바로 끝나지 않으면 poll_mover 에서 마무리, then: 마무리 후 호출) """
+        if not self.history or self.undo_pending is not None:
             return
 
         item = self.history.pop()
         moved_img = item["moved_img"]
         original_img = item["original_img"]
+        job = item.get("job")  # 이전 세션 기록이면 None (이미 이동 완료)
 
-        if os.path.exists(moved_img):
-            shutil.move(moved_img, original_img)
+        if job is None or not self.mover.cancel(job):
+            # 이미 시작/완료된 이동 → 반대로 이동 (같은 큐라서 원래 이동이 끝난 뒤 실행)
+            pairs = [(moved_img, original_img)]
+            if item["moved_txt"] and item["original_txt"]:
+                pairs.append((item["moved_txt"], item["original_txt"]))
+            journal = self.journal
 
-        moved_txt = item["moved_txt"]
-        original_txt = item["original_txt"]
-        if moved_txt and original_txt and os.path.exists(moved_txt):
-            try:
-                shutil.move(moved_txt, original_txt)
-            except Exception:
-                pass
+            def on_done(undo_job):
+                if undo_job.state == MoveJob.DONE and (job is None or job.state == MoveJob.DONE):
+                    journal.log("undo", original_img=original_img, moved_img=moved_img)
 
-        self.current_index = item["prev_index"]
-        if self.current_index < len(self.image_paths):
-            self.image_paths[self.current_index] = original_img
+            undo_job = self.mover.submit(pairs, on_done, missing_ok=True)
+            # 되돌린 이미지를 바로 표시해야 하므로 잠깐만 대기, 느린 경로면 화면을 멈추지 않고 나중에 표시
+            if not undo_job.finished.wait(timeout=0.3):
+                self.undo_pending = (undo_job, item, reload, then)
+                self.label_info.config(text=f"되돌리는 중: {os.path.basename(original_img)}")
+                return
+
+        self._finish_undo(item, reload, then)
+
+    def _finish_undo(self, item, reload, then):
+        moved_img = item["moved_img"]
+        original_img = item["original_img"]
+        name = item.get("cls")
+        if name is None:  # cls 기록 이전의 작업 기록 → 폴더로 판단
+            name = next((c["name"] for c in self.classes
+                         if os.path.normpath(self.class_dir(c)) == os.path.normpath(os.path.dirname(moved_img))), None)
+        if self.class_counts.get(name):
+            self.class_counts[name] -= 1
+            self.update_class_buttons()
+
+        if item["prev_index"] is None:
+            # 이전 세션에서 이동한 이미지 → 현재 위치에 다시 끼워 넣음
+            self.image_paths.insert(self.current_index, original_img)
         else:
-            self.image_paths.append(original_img)
+            self.current_index = item["prev_index"]
+            if self.current_index < len(self.image_paths):
+                self.image_paths[self.current_index] = original_img
+            else:
+                self.image_paths.append(original_img)
 
-        self.load_image()
+        if reload:
+            self.load_image()
+        if then is not None:
+            then()
 
     def toggle_labels(self):
         # ON <-> OFF
@@ -556,6 +1757,12 @@ class ImageClassifier:
         self.load_image()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="이미지 분류기")
+    parser.add_argument("--classes", default=None,
+                        help=f"분류 목록 JSON (기본: OK/NG, 이미지 폴더에 {CLASSES_FILE} 이 있으면 그 목록)")
+    args = parser.parse_args()
+    classes = load_classes(args.classes) if args.classes else None
+
     root = Tk()
     window_width, window_height = 1920, 1080
     screen_width = root.winfo_screenwidth()
@@ -564,5 +1771,5 @@ if __name__ == "__main__":
     y = (screen_height // 2) - (window_height // 2)
     root.geometry(f"{window_width}x{window_height}+{x}+{y}")
 
-    app = ImageClassifier(root)
+    app = ImageClassifier(root, classes)
     root.mainloop()
@@ -1,61 +1,121 @@
 import json
 import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+def labelme_to_yolo(json_path, output_dir, class_list, force=False):
+    # class_list : 리스트 또는 {이름: 번호} dict
+    class_index = class_list if isinstance(class_list, dict) else {name: i for i, name in enumerate(class_list)}
+    os.makedirs(output_dir, exist_ok=True)
+    return convert_file(json_path, output_dir, class_index, force)
+
+def convert_file(json_path, output_dir, class_index, force=False):
+    """
+    LabelMe JSON 하나 → YOLO txt (메모리에서 만든 뒤 한 번에 저장, 다시 실행해도 결과 동일)
+    return: dict(status, shapes, unknown)
+    - status : converted / skipped(출력이 JSON보다 최신) / empty(해당 클래스 없음, 기존 출력 삭제)
+    """
+    base_filename = os.path.splitext(os.path.basename(json_path))[0]
+    output_file_path = os.path.join(output_dir, base_filename + '.txt')
+
+    if not force and os.path.exists(output_file_path) \
+            and os.path.getmtime(output_file_path) >= os.path.getmtime(json_path):
+        return {'status': 'skipped', 'shapes': 0, 'unknown': {}}
 
-def labelme_to_yolo(json_path, output_dir, class_list):
     # Read the JSON file
     with open(json_path, 'r', encoding='utf-8') as f:
         data = json.load(f)
-    
+
     image_width = data['imageWidth']
     image_height = data['imageHeight']
-    
-    # Create output directory if it doesn't exist
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
-    
+    if not image_width or not image_height or image_width <= 0 or image_height <= 0:
+        raise ValueError(f'이미지 크기 이상 (imageWidth={image_width}, imageHeight={image_height})')
+
     # Iterate through shapes in the JSON file
+    lines = []
+    unknown = Counter()
     for shape in data['shapes']:
         label = shape['label']
-        if label not in class_list:
-            continue
-        
+
         # Get class index
-        class_index = class_list.index(label)
-        
+        class_id = class_index.get(label)
+        if class_id is None:
+            unknown[label] += 1
+            continue
+
         points = shape['points']
-        
+
         # Calculate YOLO format bounding box coordinates
         x_min = min(point[0] for point in points)
         y_min = min(point[1] for point in points)
         x_max = max(point[0] for point in points)
         y_max = max(point[1] for point in points)
-        
+
         x_center = (x_min + x_max) / 2 / image_width
         y_center = (y_min + y_max) / 2 / image_height
         width = (x_max - x_min) / image_width
         height = (y_max - y_min) / image_height
-        
+
         # Create YOLO format annotation
-        yolo_annotation = f"{class_index} {x_center} {y_center} {width} {height}\n"
-        
-        # Write annotation to file
-        base_filename = os.path.splitext(os.path.basename(json_path))[0]
-        output_file_path = os.path.join(output_dir, base_filename + '.txt')
-        
-        with open(output_file_path, 'a') as output_file:
-            output_file.write(yolo_annotation)
-
-def convert_directory(input_dir, output_dir, class_list):
+        lines.append(f"{class_id} {x_center} {y_center} {width} {height}\n")
+
+    if not lines:
+        # 변환할 박스가 없으면 이전 실행에서 만든 txt 도 지움
+        if os.path.exists(output_file_path):
+            os.remove(output_file_path)
+        return {'status': 'empty', 'shapes': 0, 'unknown': dict(unknown)}
+
+    # Write annotation file at once (임시 파일 → os.replace)
+    tmp_path = output_file_path + '.tmp'
+    with open(tmp_path, 'w') as output_file:
+        output_file.write(''.join(lines))
+    os.replace(tmp_path, output_file_path)
+    return {'status': 'converted', 'shapes': len(lines), 'unknown': dict(unknown)}
+
+def _convert_job(args):
+    json_path, output_dir, class_index, force = args
+    try:
+        return json_path, convert_file(json_path, output_dir, class_index, force)
+    except (OSError, ValueError, KeyError, TypeError, ZeroDivisionError) as e:
+        return json_path, {'status': 'error', 'shapes': 0, 'unknown': {}, 'error': f'{type(e).__name__}: {e}'}
+
+def convert_directory(input_dir, output_dir, class_list, workers=None, force=False):
+    """
+    폴더 안의 JSON 전체 변환 (프로세스 풀)
+    - force=False 면 출력 txt 가 JSON 보다 최신인 파일은 건너뜀
+    return: 통계 dict (converted / skipped / empty / errors / shapes / unknown_labels)
+    """
+    class_index = class_list if isinstance(class_list, dict) else {name: i for i, name in enumerate(class_list)}
+    os.makedirs(output_dir, exist_ok=True)
+
     # Iterate over all files in the input directory
-    for filename in os.listdir(input_dir):
-        if filename.endswith('.json'):
-            json_path = os.path.join(input_dir, filename)
-            labelme_to_yolo(json_path, output_dir, class_list)
+    with os.scandir(input_dir) as it:
+        jobs = [(entry.path, output_dir, class_index, force) for entry in it if entry.name.endswith('.json')]
+
+    stats = {'files': len(jobs), 'converted': 0, 'skipped': 0, 'empty': 0, 'shapes': 0,
+             'errors': {}, 'unknown_labels': Counter()}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunksize = max(1, len(jobs) // ((workers or os.cpu_count() or 1) * 8))
+        for json_path, result in pool.map(_convert_job, jobs, chunksize=chunksize):
+            if result['status'] == 'error':
+                stats['errors'][os.path.basename(json_path)] = result['error']
+                continue
+            stats[result['status']] += 1
+            stats['shapes'] += result['shapes']
+            stats['unknown_labels'].update(result['unknown'])
+
+    stats['unknown_labels'] = dict(stats['unknown_labels'])
+    print(f"변환 {stats['converted']} / 건너뜀 {stats['skipped']} / 박스 없음 {stats['empty']} / "
+          f"실패 {len(stats['errors'])} (총 {stats['files']}개, 박스 {stats['shapes']}개)")
+    if stats['unknown_labels']:
+        print(f"class_list 에 없는 라벨: {stats['unknown_labels']}")
+    return stats
 
-# Example usage
-input_dir = '/home/nongshim/Label/burn/240125k/R/'
-output_dir = '/home/nongshim/Label/burn/240125k/R/'
-class_list = ['Empty', 'Reject']  # Replace with your actual class names
 
-convert_directory(input_dir, output_dir, class_list)
+if __name__ == "__main__":
+    # Example usage
+    input_dir = '/home/nongshim/Label/burn/240125k/R/'
+    output_dir = '/home/nongshim/Label/burn/240125k/R/'
+    class_list = ['Empty', 'Reject']  # Replace with your actual class names
 
+    convert_directory(input_dir, output_dir, class_list)
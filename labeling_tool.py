@@ -1,105 +1,682 @@
+import hashlib
+import json
+import math
 import os
+import re
+import shutil
+import sqlite3
 from collections import Counter
+from datetime import datetime
+
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+HIST_BINS = 10  # 박스 크기 히스토그램 구간 수 (정규화 크기 0~1)
+SCAN_WORKERS = 16  # 라벨 파일 읽기 스레드 수 (NAS처럼 지연이 큰 경로일수록 많이)
+INDEX_DIR = os.path.join(os.path.expanduser("~"), ".cache", "labeling_tool")  # 색인은 로컬 디스크에 (라벨 폴더는 NAS / 읽기 전용일 수 있음)
+INDEX_VERSION = 2
+IMG_EXTS = (".png", ".jpg", ".jpeg", ".bmp", ".gif")
+DUPLICATE_IOU = 0.9  # 같은 이미지, 같은 클래스에서 이 이상 겹치면 중복 박스
+BACKUP_DIR = ".remap_backup"  # 일괄 변경 전 원본 보관 (라벨 폴더/.remap_backup/시각/)
+
+def change_label_all(dir, label_before, label_after, index=None): # 라벨 일괄 변경
+    return remap_labels(dir, {str(label_before): str(label_after)}, index=index)
+
+
+def write_atomic(file_path, data: bytes):
+    """ 임시 파일에 쓴 뒤 os.replace → 중간에 종료되어도 반쯤 쓴 파일이 남지 않음 """
+    tmp = file_path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, file_path)
+
+
+def remap_file(file_path, mapping, dry_run=False, backup_dir=None):
+    """
+    txt 하나에 클래스 변경 적용 (mapping: {이전: 이후}, 이후가 None 이면 그 줄 삭제)
+    return: dict(changed, deleted, skipped) / skipped: 바꿀 클래스가 없어 건드리지 않음
+    """
+    with open(file_path, "rb") as f:
+        data = f.read()
+
+    # 빠른 검사 : 줄 첫 값(앞 공백 무시)에 바꿀 클래스가 없으면 파싱 없이 건너뜀
+    keys = b"|".join(re.escape(k.encode("utf-8")) for k in mapping)
+    if not re.search(rb"(?m)^[ \t\f\v]*(?:" + keys + rb")(?:[ \t\f\v]|$)", data.replace(b"\r", b"")):
+        return {"changed": 0, "deleted": 0, "skipped": True}
+
+    new_lines = []
+    changed = deleted = 0
+    for line in data.decode("utf-8", errors="ignore").splitlines():
+        parts = line.split()
+        if not parts:
+            continue
+        if parts[0] in mapping:
+            if mapping[parts[0]] is None:
+                deleted += 1
+                continue
+            if parts[0] != mapping[parts[0]]:
+                parts[0] = mapping[parts[0]]
+                changed += 1
+        new_lines.append(" ".join(parts))
+
+    if (changed or deleted) and not dry_run:
+        if backup_dir is not None:
+            shutil.copy2(file_path, os.path.join(backup_dir, os.path.basename(file_path)))
+        write_atomic(file_path, ("\n".join(new_lines) + "\n").encode("utf-8") if new_lines else b"")
+    return {"changed": changed, "deleted": deleted, "skipped": not (changed or deleted)}
+
+
+def remap_labels(label_dir, mapping, dry_run=False, index=None, workers=SCAN_WORKERS, backup=True):
+    """
+    클래스 일괄 변경 (여러 개 동시, 삭제 포함)
+    - mapping : {"2": "1", "5": None} (None → 해당 줄 삭제)
+    - dry_run : 파일은 그대로 두고 변경될 내용만 보고 (._ 메타파일도 삭제하지 않음)
+    - backup : 바뀌는 파일의 원본을 .remap_backup/시각/ 에 보관 + manifest.json → rollback_remap 으로 복구
+    - index : LabelIndex 가 있으면 바꿀 클래스가 들어 있는 파일만 검사
+    return: 보고서 dict
+    """
+    mapping = {str(k): (None if v is None else str(v)) for k, v in mapping.items()}
+    if index is not None:
+        index.refresh(remove_meta=not dry_run)  # 미리보기는 라벨 폴더를 바꾸지 않음 (색인은 로컬 캐시)
+        names = sorted({n for cls in mapping for n in index.files_with_class(cls)})
+    else:
+        names, _ = list_label_files(label_dir, remove_meta=not dry_run)
+
+    backup_dir = None
+    if backup and not dry_run:
+        backup_dir = os.path.join(label_dir, BACKUP_DIR, datetime.now().strftime("%Y%m%d_%H%M%S_%f"))
+        os.makedirs(backup_dir)
+
+    report = {"label_dir": os.path.abspath(label_dir), "mapping": mapping, "dry_run": dry_run,
+              "files_scanned": len(names), "files_skipped": 0, "files_changed": 0,
+              "lines_changed": 0, "lines_deleted": 0, "changed_files": [], "errors": {},
+              "backup_dir": backup_dir}
+
+    def work(name):
+        return remap_file(os.path.join(label_dir, name), mapping, dry_run, backup_dir)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [(name, pool.submit(work, name)) for name in names]
+        for name, future in futures:
+            try:
+                result = future.result()
+            except OSError as e:
+                report["errors"][name] = str(e)
+                continue
+            if result["skipped"]:
+                report["files_skipped"] += 1
+                continue
+            report["files_changed"] += 1
+            report["lines_changed"] += result["changed"]
+            report["lines_deleted"] += result["deleted"]
+            report["changed_files"].append(name)
+
+    if backup_dir is not None and not report["files_changed"]:
+        shutil.rmtree(backup_dir, ignore_errors=True)  # 바뀐 파일이 없으면 보관본도 남기지 않음
+        backup_dir = report["backup_dir"] = None
+    if backup_dir is not None:
+        with open(os.path.join(backup_dir, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump({k: v for k, v in report.items() if k != "backup_dir"}, f, ensure_ascii=False, indent=2)
+    if index is not None and not dry_run:
+        index.refresh()
+
+    title = "🔎 변경 미리보기 (파일은 그대로)" if dry_run else "✅ 라벨 일괄 변경 완료"
+    print(f"{title}: 파일 {report['files_changed']}/{report['files_scanned']}개, "
+          f"변경 {report['lines_changed']}줄, 삭제 {report['lines_deleted']}줄")
+    if report["errors"]:
+        print(f"⚠️ 실패 {len(report['errors'])}개: {', '.join(list(report['errors'])[:5])}")
+    if backup_dir is not None:
+        print(f"   원본 보관: {backup_dir}")
+    return report
+
+
+def list_backups(label_dir):
+    root = os.path.join(label_dir, BACKUP_DIR)
+    if not os.path.isdir(root):
+        return []
+    return sorted(os.path.join(root, d) for d in os.listdir(root) if os.path.isdir(os.path.join(root, d)))
+
+
+def rollback_remap(backup_dir, label_dir=None):
+    """
+    remap_labels 로 바뀐 파일을 보관된 원본으로 복구
+    - manifest.json 이 없어도(변경 도중 종료) 보관된 파일은 모두 복구
+    """
+    manifest_path = os.path.join(backup_dir, "manifest.json")
+    if label_dir is None:
+        if os.path.exists(manifest_path):
+            with open(manifest_path, "r", encoding="utf-8") as f:
+                label_dir = json.load(f)["label_dir"]
+        else:
+            label_dir = os.path.dirname(os.path.dirname(os.path.abspath(backup_dir)))
 
-def change_label_all(dir, label_before, label_after): # 라벨 일괄 변경
-    LABEL_DIR = dir
-    OLD_CLASS = str(label_before)
-    NEW_CLASS = str(label_after)
-
-    for filename in os.listdir(LABEL_DIR):
-        if not filename.endswith(".txt"):
+    restored = 0
+    for name in os.listdir(backup_dir):
+        if not name.endswith(".txt"):
             continue
+        with open(os.path.join(backup_dir, name), "rb") as f:
+            write_atomic(os.path.join(label_dir, name), f.read())
+        restored += 1
+    os.rename(backup_dir, backup_dir + "_restored")  # 같은 보관본으로 두 번 복구하지 않도록
+    print(f"↩️ {restored}개 파일 복구 완료")
+    return restored
+
+
+def parse_mapping(text):
+    """ "2:1 3:1 5:-" → {"2": "1", "3": "1", "5": None} ("-" 는 삭제) """
+    mapping = {}
+    for item in text.replace(",", " ").split():
+        before, _, after = item.partition(":")
+        if not before or not after:
+            raise ValueError(f"잘못된 형식: {item} (예: 2:1 5:-)")
+        mapping[before] = None if after == "-" else after
+    return mapping
+
+
+class LabelStats:
+    """
+    라벨 폴더 통계 (scan_labels 한 번으로 생성)
+    - class_counts : 클래스별 박스 수
+    - file_classes : 파일별 포함 클래스 집합
+    - box_counts : 파일별 박스 수
+    - width_hist / height_hist / area_hist : 정규화 박스 크기 히스토그램 (HIST_BINS 구간)
+    """
+    def __init__(self, label_dir):
+        self.label_dir = label_dir
+        self.class_counts = Counter()
+        self.file_classes = {}
+        self.box_counts = {}
+        self.width_hist = [0] * HIST_BINS
+        self.height_hist = [0] * HIST_BINS
+        self.area_hist = [0] * HIST_BINS
+        self.removed = []  # 삭제한 macOS 메타파일
+
+    def add(self, filename, result):
+        classes, boxes, w_hist, h_hist, a_hist = result
+        self.class_counts.update(classes)
+        self.file_classes[filename] = set(classes)
+        self.box_counts[filename] = boxes
+        for total, part in ((self.width_hist, w_hist), (self.height_hist, h_hist), (self.area_hist, a_hist)):
+            for i, v in enumerate(part):
+                total[i] += v
+
+    def minority_class(self):
+        if not self.class_counts:
+            return None
+        return min(self.class_counts, key=self.class_counts.get)
+
+    def files_with_class(self, class_id):
+        return sorted(f for f, classes in self.file_classes.items() if class_id in classes)
+
+    def total_boxes(self):
+        return sum(self.box_counts.values())
+
+    def file_count(self):
+        return len(self.box_counts)
+
+
+def size_bin(v):
+    return max(0, min(HIST_BINS - 1, int(v * HIST_BINS)))
+
+
+def parse_row(parts):
+    """ 한 줄(split 결과) → (class, xc, yc, w, h), 없거나 숫자가 아닌 값은 값마다 None (두 읽기 경로 공통) """
+    coords = []
+    for v in parts[1:5]:
+        try:
+            f = float(v)
+        except ValueError:
+            f = None
+        coords.append(f if f is not None and math.isfinite(f) else None)
+    return (parts[0],) + tuple(coords) + (None,) * (4 - len(coords))
+
+
+def parse_label_file(file_path):
+    """ txt 하나 읽기 → (클래스 Counter, 박스 수, 너비/높이/면적 히스토그램) """
+    classes = Counter()
+    boxes = 0
+    w_hist = [0] * HIST_BINS
+    h_hist = [0] * HIST_BINS
+    a_hist = [0] * HIST_BINS
+    with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            parts = line.split()
+            if not parts:
+                continue
+            cls, _, _, w, h = parse_row(parts)
+            classes[cls] += 1
+            boxes += 1
+            if w is None or h is None:
+                continue
+            w_hist[size_bin(w)] += 1
+            h_hist[size_bin(h)] += 1
+            a_hist[size_bin(w * h)] += 1
+    return classes, boxes, w_hist, h_hist, a_hist
+
+
+def iter_label_entries(label_dir, removed, remove_meta=True):
+    """
+    os.scandir 한 번으로 txt 항목
+    - macOS 숨김 메타파일 ._*.txt 는 제외, remove_meta 면 삭제하고 removed 에 추가 (False: 디스크 변경 없음)
+    """
+    with os.scandir(label_dir) as it:
+        for entry in it:
+            name = entry.name
+            if not name.endswith(".txt"):
+                continue
+            if name.startswith("._"):
+                if remove_meta:
+                    os.remove(entry.path)
+                    removed.append(name)
+                continue
+            if entry.is_file():
+                yield entry
 
-        file_path = os.path.join(LABEL_DIR, filename)
 
-        # 1) 읽기
-        with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-            lines = f.readlines()
+def list_label_files(label_dir, remove_meta=True):
+    """ txt 파일명 목록. return: (names, 삭제한 메타파일) """
+    removed = []
+    names = [entry.name for entry in iter_label_entries(label_dir, removed, remove_meta)]
+    return names, removed
 
-        # 2) 변환
-        new_lines = []
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
 
-            parts = line.split()
-            if parts and parts[0] == OLD_CLASS:
-                parts[0] = NEW_CLASS
-
-            new_lines.append(" ".join(parts))
-
-        # 3) 쓰기 (읽기 with와 별개로 다시 열기)
-        with open(file_path, "w", encoding="utf-8") as f:
-            if new_lines:
-                f.write("\n".join(new_lines) + "\n")
-            else:
-                # 빈 파일로 만들고 싶으면 그냥 "" 쓰면 됨
-                f.write("")
-                # 혹시 " " 한 칸 넣고 싶으면 f.write(" ") 로 바꾸면 됨
-
-    print("✅ 모든 라벨 수정 완료")
-
-def label_checker(dir): # 라벨 분포도 확인
-    LABEL_DIR = dir
-    class_counter = Counter()
-
-    for filename in os.listdir(LABEL_DIR):
-        # ✅ macOS 숨김 메타파일 삭제
-        if filename.startswith("._") and filename.endswith(".txt"):
-            os.remove(os.path.join(LABEL_DIR, filename))
-            continue
-            
-        if not filename.endswith(".txt"):
+def stat_label_files(label_dir, remove_meta=True):
+    """ txt 파일별 (mtime_ns, size), 스캔 결과의 stat 사용. return: ({name: (mtime_ns, size)}, 삭제한 메타파일) """
+    removed = []
+    current = {}
+    for entry in iter_label_entries(label_dir, removed, remove_meta):
+        try:
+            st = entry.stat()
+        except OSError:
             continue
+        current[entry.name] = (st.st_mtime_ns, st.st_size)
+    return current, removed
+
+
+def scan_labels(label_dir, workers=SCAN_WORKERS):
+    """ 라벨 폴더를 한 번만 훑어서 LabelStats 생성 (파일 읽기는 스레드 풀) """
+    stats = LabelStats(label_dir)
+    names, stats.removed = list_label_files(label_dir)
+    paths = [os.path.join(label_dir, n) for n in names]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for name, result in zip(names, pool.map(parse_label_file, paths)):
+            stats.add(name, result)
+    return stats
+
+
+def parse_label_rows(file_path):
+    """ txt 하나 읽기 → [(class, xc, yc, w, h)], 값 규칙은 parse_row (parse_label_file 과 같은 분포) """
+    rows = []
+    with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            parts = line.split()
+            if parts:
+                rows.append(parse_row(parts))
+    return rows
+
+
+class LabelIndex:
+    """
+    라벨 폴더 색인 (SQLite, ~/.cache/labeling_tool/<sha1(라벨 폴더 절대 경로)>.sqlite)
+    - files : 파일별 mtime / size / 박스 수 → refresh() 때 바뀐 파일만 다시 읽음
+    - rows : 파일별 YOLO 행 (class, xc, yc, w, h)
+    - 분포 / 소수 클래스 파일 / 변경 대상 파일 조회는 디스크 대신 색인에서
+    """
+    def __init__(self, label_dir, db_path=None, workers=SCAN_WORKERS):
+        self.label_dir = label_dir
+        self.workers = workers
+        if db_path is None:
+            os.makedirs(INDEX_DIR, exist_ok=True)
+            key = hashlib.sha1(os.path.abspath(label_dir).encode("utf-8")).hexdigest()
+            db_path = os.path.join(INDEX_DIR, key + ".sqlite")
+        self.conn = sqlite3.connect(db_path)
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != INDEX_VERSION:
+            self.conn.executescript("DROP TABLE IF EXISTS files; DROP TABLE IF EXISTS rows;")
+            self.conn.execute(f"PRAGMA user_version={INDEX_VERSION}")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS files (name TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, boxes INTEGER);
+            CREATE TABLE IF NOT EXISTS rows (name TEXT, cls TEXT, xc REAL, yc REAL, w REAL, h REAL);
+            CREATE INDEX IF NOT EXISTS rows_name ON rows(name);
+            CREATE INDEX IF NOT EXISTS rows_cls ON rows(cls, name);
+        """)
+        self.removed = []
+
+    def refresh(self, remove_meta=True):
+        """
+        폴더와 색인 비교 → 새 파일/바뀐 파일만 파싱, 없어진 파일은 색인에서 삭제. return: (갱신 수, 삭제 수)
+        - remove_meta=False : ._ 메타파일을 지우지 않음 (라벨 폴더는 읽기만)
+        """
+        current, removed = stat_label_files(self.label_dir, remove_meta)
+        if remove_meta:
+            self.removed = removed
+        known = {name: (mtime, size) for name, mtime, size in self.conn.execute("SELECT name, mtime_ns, size FROM files")}
+
+        changed = [n for n, sig in current.items() if known.get(n) != sig]
+        gone = [n for n in known if n not in current]
+        paths = [os.path.join(self.label_dir, n) for n in changed]
+        with ThreadPoolExecutor(max_workers=self.workers) as pool, self.conn:
+            for name, rows in zip(changed, pool.map(parse_label_rows, paths)):
+                mtime, size = current[name]
+                self.conn.execute("DELETE FROM rows WHERE name=?", (name,))
+                self.conn.executemany("INSERT INTO rows VALUES (?, ?, ?, ?, ?, ?)", [(name,) + r for r in rows])
+                self.conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)", (name, mtime, size, len(rows)))
+            for name in gone:
+                self.conn.execute("DELETE FROM rows WHERE name=?", (name,))
+                self.conn.execute("DELETE FROM files WHERE name=?", (name,))
+        return len(changed), len(gone)
+
+    def class_counts(self):
+        return Counter(dict(self.conn.execute("SELECT cls, COUNT(*) FROM rows GROUP BY cls")))
+
+    def files_with_class(self, class_id):
+        return [r[0] for r in self.conn.execute("SELECT DISTINCT name FROM rows WHERE cls=? ORDER BY name", (str(class_id),))]
+
+    def histogram(self, expr):
+        hist = [0] * HIST_BINS
+        query = f"SELECT MAX(0, MIN({HIST_BINS - 1}, CAST(({expr}) * {HIST_BINS} AS INTEGER))), COUNT(*) " \
+                f"FROM rows WHERE w IS NOT NULL AND h IS NOT NULL GROUP BY 1"
+        for b, count in self.conn.execute(query):
+            hist[b] = count
+        return hist
+
+    def stats(self):
+        return IndexedLabelStats(self)
+
+    def close(self):
+        self.conn.close()
+
+
+def open_label_index(label_dir):
+    """ 색인을 열 수 없으면 (권한, 디스크 등) None → scan_labels 로 전체 읽기 """
+    try:
+        return LabelIndex(label_dir)
+    except (OSError, sqlite3.Error) as e:
+        print(f"⚠️ 라벨 색인을 사용할 수 없습니다 (매번 전체 읽기): {e}")
+        return None
 
-        file_path = os.path.join(LABEL_DIR, filename)
 
-        with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
+def index_stats(index):
+    """ 색인 갱신 후 통계, 색인이 없거나 갱신에 실패하면 None (→ label_checker 가 scan_labels) """
+    if index is None:
+        return None
+    try:
+        index.refresh()
+        return index.stats()
+    except sqlite3.Error as e:
+        print(f"⚠️ 라벨 색인 갱신 실패 (전체 읽기): {e}")
+        return None
+
+
+class IndexedLabelStats(LabelStats):
+    """ LabelIndex 기반 통계 (집계는 SQL, 파일별 목록은 필요할 때만 조회) """
+    def __init__(self, index):
+        super().__init__(index.label_dir)
+        self.index = index
+        self.removed = index.removed
+        self.class_counts = index.class_counts()
+        self.width_hist = index.histogram("w")
+        self.height_hist = index.histogram("h")
+        self.area_hist = index.histogram("w * h")
+
+    def files_with_class(self, class_id):
+        return self.index.files_with_class(class_id)
+
+    def total_boxes(self):
+        return self.index.conn.execute("SELECT COALESCE(SUM(boxes), 0) FROM files").fetchone()[0]
 
-                class_id = line.split()[0]
-                class_counter[class_id] += 1
+    def file_count(self):
+        return self.index.conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
 
-    print("📊 클래스 분포:")
-    for cls, count in class_counter.items():
+
+VALIDATE_CHUNK = 256  # 검사 시 스레드 작업 하나가 읽을 파일 수
+IOU_BLOCK = 1 << 20  # 중복 검사 때 한 번에 계산할 박스 쌍 수 상한 (메모리 ~ 쌍 수 x 수십 바이트)
+IOU_SWEEP_K = 64  # 그룹(이미지+클래스) 박스가 이보다 많으면 x 범위가 겹치는 쌍만 비교
+
+
+def read_label_chunk(paths):
+    """
+    txt 여러 개 읽기 → 파일별 (5개 필드 줄의 토큰 flat 리스트, 그 줄 번호들, 나머지 줄 [(줄 번호, 토큰)])
+    """
+    results = []
+    for file_path in paths:
+        tokens, line_nos, others = [], [], []
+        with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+            for no, line in enumerate(f, 1):
+                parts = line.split()
+                if len(parts) == 5:
+                    tokens.extend(parts)
+                    line_nos.append(no)
+                elif parts:
+                    others.append((no, parts))
+        results.append((tokens, line_nos, others))
+    return results
+
+
+def pair_iou(a, b):
+    """ 박스 (..., 4) 두 묶음의 IoU (x1, y1, x2, y2, 브로드캐스트) """
+    iw = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    ih = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    inter = iw * ih
+    union = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1]) + (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1]) - inter
+    return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+
+def sweep_pairs(idx, boxes, keep):
+    """ 큰 그룹 하나: x1 순 정렬 → 각 박스는 x1 이 자기 x2 보다 작은 뒤쪽 박스와만 비교 (IOU_BLOCK 쌍씩) """
+    b = boxes[idx]
+    o = np.argsort(b[:, 0], kind="stable")
+    idx, b = idx[o], b[o]
+    k = len(idx)
+    counts = np.maximum(np.searchsorted(b[:, 0], b[:, 2], side="left") - np.arange(k) - 1, 0)
+    cum = np.concatenate(([0], np.cumsum(counts)))
+    start = 0
+    while start < k:
+        stop = int(np.searchsorted(cum, cum[start] + IOU_BLOCK, side="right")) - 1
+        stop = min(k, max(start + 1, stop))
+        n = counts[start:stop]
+        total = int(n.sum())
+        if total:
+            ii = np.repeat(np.arange(start, stop), n)
+            jj = ii + 1 + np.arange(total) - np.repeat(cum[start:stop] - cum[start], n)
+            keep(idx[ii], idx[jj], pair_iou(b[ii], b[jj]))
+        start = stop
+
+
+def box_iou_groups(boxes, groups, min_iou=0.0):
+    """
+    같은 그룹(이미지+클래스) 안의 박스 쌍 중 IoU > 0 이고 min_iou 이상인 쌍
+    - boxes : (N, 4) x1, y1, x2, y2 / groups : (N,) 그룹 번호
+    - 작은 그룹 : 크기가 같은 것끼리 (F, 쌍 수) 로 묶어 한 번에 계산 (F 는 IOU_BLOCK 쌍 이내로 나눔)
+    - 큰 그룹 (k > IOU_SWEEP_K) : x 범위가 겹치는 쌍만 계산 (sweep_pairs)
+    return: (i, j, iou) 배열 (i < j, 원래 행 번호, 정렬됨)
+    """
+    order = np.argsort(groups, kind="stable")
+    _, starts, sizes = np.unique(groups[order], return_index=True, return_counts=True)
+    out_i, out_j, out_iou = [], [], []
+
+    def keep(i, j, iou):
+        hit = (iou > 0) & (iou >= min_iou)
+        i, j = i[hit], j[hit]
+        out_i.append(np.minimum(i, j))
+        out_j.append(np.maximum(i, j))
+        out_iou.append(iou[hit])
+
+    for k in np.unique(sizes[sizes > 1]):
+        sel_all = starts[sizes == k]
+        if k > IOU_SWEEP_K:
+            for s in sel_all:
+                sweep_pairs(order[s:s + k], boxes, keep)
+            continue
+        a, c = np.triu_indices(k, 1)
+        step = max(1, IOU_BLOCK // len(a))
+        for f in range(0, len(sel_all), step):
+            sel = sel_all[f:f + step]
+            idx = order[sel[:, None] + np.arange(k)[None, :]]  # (F, k)
+            b = boxes[idx]                                      # (F, k, 4)
+            keep(idx[:, a].ravel(), idx[:, c].ravel(), pair_iou(b[:, a], b[:, c]).ravel())
+    if not out_i:
+        return np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0)
+    i, j, iou = np.concatenate(out_i), np.concatenate(out_j), np.concatenate(out_iou)
+    o = np.lexsort((j, i))
+    return i[o], j[o], iou[o]
+
+
+def validate_labels(label_dir, image_dir=None, iou_threshold=DUPLICATE_IOU, report_path=None, workers=SCAN_WORKERS):
+    """
+    라벨 무결성 검사 → 보고서 dict (report_path 지정 시 JSON 저장)
+    - malformed : 5개 필드가 아니거나 숫자가 아닌 좌표
+    - non_integer_class : 클래스가 정수 ID 가 아님 (이름 라벨)
+    - out_of_range : 좌표가 0~1 밖이거나 박스가 이미지 밖으로 나감
+    - zero_area : 너비 또는 높이가 0 이하
+    - duplicates : 같은 이미지/클래스에서 IoU >= iou_threshold
+    - orphan_labels : 이미지가 없는 txt / missing_labels : txt 가 없는 이미지
+    """
+    image_dir = image_dir or label_dir
+    names, _ = list_label_files(label_dir, remove_meta=False)  # 검사는 폴더를 바꾸지 않음
+    paths = [os.path.join(label_dir, n) for n in names]
+    chunks = [paths[i:i + VALIDATE_CHUNK] for i in range(0, len(paths), VALIDATE_CHUNK)]
+
+    malformed = []
+    tokens, line_nos, per_file = [], [], []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        fid = 0
+        for chunk in pool.map(read_label_chunk, chunks):
+            for file_tokens, file_lines, others in chunk:
+                tokens.extend(file_tokens)
+                line_nos.extend(file_lines)
+                per_file.append(len(file_lines))
+                for no, parts in others:
+                    reason = "too_few_fields" if len(parts) < 5 else "extra_fields"
+                    malformed.append({"file": names[fid], "line": no, "reason": reason, "text": " ".join(parts)[:120]})
+                fid += 1
+    total_lines = len(line_nos) + len(malformed)
+
+    # 모든 행을 (N, 5) 배열로 → 좌표 변환은 한 번에, 실패하면 잘못된 줄만 골라냄
+    table = np.array(tokens, dtype=str).reshape(-1, 5)
+    n = len(table)
+    classes = table[:, 0]
+    file_ids = np.repeat(np.arange(len(names)), per_file)
+    line_nos = np.asarray(line_nos, np.int64)
+    bad = np.zeros(n, bool)
+    values = np.full((n, 4), np.nan)
+    for start in range(0, n, 65536):
+        block = table[start:start + 65536, 1:]
+        try:
+            values[start:start + len(block)] = block.astype(np.float64)
+        except ValueError:  # 숫자가 아닌 값이 있는 구간만 줄 단위로
+            for i, row in enumerate(block, start):
+                try:
+                    values[i] = [float(v) for v in row]
+                except ValueError:
+                    bad[i] = True
+    bad |= ~np.isfinite(values).all(axis=1)
+    for i in np.flatnonzero(bad):
+        malformed.append({"file": names[file_ids[i]], "line": int(line_nos[i]), "reason": "non_numeric",
+                          "text": " ".join(table[i])[:120]})
+
+    def rows(mask):
+        return [{"file": names[file_ids[i]], "line": int(line_nos[i])} for i in np.flatnonzero(mask)]
+
+    ok = ~bad
+    xc, yc, w, h = values.T
+    cls_int = np.char.isdigit(classes) if n else np.zeros(0, bool)
+    eps = 1e-6
+    x1, y1, x2, y2 = xc - w / 2, yc - h / 2, xc + w / 2, yc + h / 2
+    with np.errstate(invalid="ignore"):
+        out_of_range = ok & (((values < -eps) | (values > 1 + eps)).any(axis=1)
+                             | (x1 < -eps) | (y1 < -eps) | (x2 > 1 + eps) | (y2 > 1 + eps))
+        zero_area = ok & ((w <= 0) | (h <= 0))
+
+    # 중복 : (파일, 클래스) 그룹 안에서만 비교
+    valid = ok & ~zero_area
+    vi = np.flatnonzero(valid)
+    duplicates = []
+    if len(vi):
+        _, cls_ids = np.unique(classes[vi], return_inverse=True)
+        groups = file_ids[vi] * (cls_ids.max() + 1) + cls_ids
+        boxes = np.stack([x1[vi], y1[vi], x2[vi], y2[vi]], axis=1)
+        a, b, iou = box_iou_groups(boxes, groups, iou_threshold)
+        for i, j, v in zip(vi[a], vi[b], iou):
+            duplicates.append({"file": names[file_ids[i]], "line_a": int(line_nos[i]), "line_b": int(line_nos[j]),
+                               "iou": round(float(v), 4)})
+
+    # 이미지 짝 확인
+    stems = {}
+    with os.scandir(image_dir) as it:
+        for entry in it:
+            stem, ext = os.path.splitext(entry.name)
+            if ext.lower() in IMG_EXTS:
+                stems[stem] = entry.name
+    label_stems = {os.path.splitext(n)[0] for n in names}
+    orphan_labels = sorted(n for n in names if os.path.splitext(n)[0] not in stems)
+    missing_labels = sorted(f for stem, f in stems.items() if stem not in label_stems)
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "label_dir": os.path.abspath(label_dir), "image_dir": os.path.abspath(image_dir),
+        "iou_threshold": iou_threshold,
+        "summary": {"files": len(names), "lines": total_lines,
+                    "malformed": len(malformed), "non_integer_class": int((ok & ~cls_int).sum()),
+                    "out_of_range": int(out_of_range.sum()), "zero_area": int(zero_area.sum()),
+                    "duplicates": len(duplicates), "orphan_labels": len(orphan_labels),
+                    "missing_labels": len(missing_labels)},
+        "malformed": malformed,
+        "non_integer_class": rows(ok & ~cls_int),
+        "out_of_range": rows(out_of_range),
+        "zero_area": rows(zero_area),
+        "duplicates": duplicates,
+        "orphan_labels": orphan_labels,
+        "missing_labels": missing_labels,
+    }
+    if report_path:
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print("🩺 라벨 검사 결과:")
+    for key, value in report["summary"].items():
+        print(f"  {key}: {value}")
+    if report_path:
+        print(f"   보고서: {report_path}")
+    return report
+
+
+def print_histogram(title, hist):
+    total = sum(hist) or 1
+    print(f"\n📏 {title}:")
+    for i, count in enumerate(hist):
+        lo, hi = i / HIST_BINS, (i + 1) / HIST_BINS
+        bar = "#" * int(count / total * 40)
+        print(f"  {lo:.1f}~{hi:.1f}: {count:>8} {bar}")
+
+
+def label_checker(dir, stats=None): # 라벨 분포도 확인
+    if stats is None:
+        stats = scan_labels(dir)
+
+    print(f"📊 클래스 분포: (파일 {stats.file_count()}개 / 박스 {stats.total_boxes()}개)")
+    for cls, count in stats.class_counts.items():
         print(f"  class {cls}: {count}개")
 
-    if not class_counter:
+    minority_class = stats.minority_class()
+    if minority_class is None:
         return None
 
-    minority_class = min(class_counter, key=class_counter.get)
+    print_histogram("박스 너비 분포", stats.width_hist)
+    print_histogram("박스 높이 분포", stats.height_hist)
     print(f"\n⚠️ 이상(소수) 클래스: class {minority_class}")
 
     return minority_class
 
-def label_checker_minor(dir): # 이상 클래스 탐지
-    minority_class = label_checker(dir)
+def label_checker_minor(dir, stats=None): # 이상 클래스 탐지
+    if stats is None:
+        stats = scan_labels(dir)
+    minority_class = label_checker(dir, stats)
     if minority_class is None:
         print("⚠️ 라벨이 없습니다.")
         return
-      
-    LABEL_DIR = dir
-    minority_files = []
-
-    for filename in os.listdir(LABEL_DIR):
-        if not filename.endswith(".txt"):
-            continue
-
-        file_path = os.path.join(LABEL_DIR, filename)
 
-        with open(file_path, "r") as f:
-            for line in f:
-                if not line.strip():
-                    continue
-
-                class_id = line.split()[0]
-                if class_id == minority_class:
-                    minority_files.append(filename)
-                    break
+    # 파일별 클래스 정보는 이미 있으므로 다시 읽지 않음
+    minority_files = stats.files_with_class(minority_class)
 
     print("\n🗂️ 이상 클래스가 포함된 파일:")
     for f in minority_files:
@@ -108,6 +685,7 @@ def label_checker_minor(dir): # 이상 클래스 탐지
 
 if __name__ == "__main__":
     label_dir = r"/media/nongshim/6b72d907-6052-4623-83a8-ffe32c269d0b1/Database/film/251210p/NG"  # 라벨 폴더 경로로 수정
+    index = open_label_index(label_dir)  # 바뀐 파일만 다시 읽음 (None 이면 매번 전체 읽기)
   
     while True:
         print(f"\n📂 현재 선택된 라벨 경로:")
@@ -116,22 +694,56 @@ if __name__ == "__main__":
         print("1. 라벨 분포 확인")
         print("2. 이상(소수) 클래스 탐지")
         print("3. 라벨 일괄 변경")
+        print("4. 라벨 일괄 변경 (여러 클래스 / 삭제, 미리보기)")
+        print("5. 일괄 변경 되돌리기")
+        print("6. 라벨 무결성 검사 (보고서 JSON)")
         print("0. 종료")
 
         choice = input("👉 번호를 선택하세요: ").strip()
 
         if choice == "1":
-            label_checker(label_dir)
+            label_checker(label_dir, index_stats(index))
 
         elif choice == "2":
-            label_checker_minor(label_dir)
+            label_checker_minor(label_dir, index_stats(index))
 
         elif choice == "3":
             before = input("변경할 class_id (예: 2): ").strip()
             after = input("변경 후 class_id (예: 1): ").strip()
-            change_label_all(label_dir, before, after)
+            change_label_all(label_dir, before, after, index)
+
+        elif choice == "4":
+            try:
+                mapping = parse_mapping(input("변경 목록 (예: 2:1 3:1 5:- , '-' 는 삭제): "))
+            except ValueError as e:
+                print(f"⚠️ {e}")
+                continue
+            report = remap_labels(label_dir, mapping, dry_run=True, index=index)
+            if report["files_changed"] and input("적용할까요? (y/N): ").strip().lower() == "y":
+                remap_labels(label_dir, mapping, index=index)
+
+        elif choice == "5":
+            backups = [b for b in list_backups(label_dir) if not b.endswith("_restored")]
+            if not backups:
+                print("⚠️ 되돌릴 변경이 없습니다.")
+                continue
+            for i, b in enumerate(backups):
+                print(f"  {i}. {os.path.basename(b)}")
+            sel = input("되돌릴 번호 (기본: 마지막): ").strip()
+            try:
+                rollback_remap(backups[int(sel)] if sel else backups[-1], label_dir)
+            except (ValueError, IndexError):
+                print("⚠️ 올바른 번호를 선택하세요.")
+            if index is not None:
+                index.refresh()
+
+        elif choice == "6":
+            image_dir = input("이미지 폴더 (기본: 라벨 폴더): ").strip() or label_dir
+            validate_labels(label_dir, image_dir, report_path=os.path.join(label_dir, "label_report.json"))
 
         elif choice == "0":
+            if index is not None:
+                index.close()
             print("👋 프로그램을 종료합니다.")
             break
 